@@ -14,7 +14,7 @@ async def handle_delete(update: Update, context: CallbackContext) -> None:
     if not query or not query.data:
         return
     await query.answer()
-    parts = query.data.split(":")
+    parts = query.data.split(":", 3)
     if len(parts) < 3:
         return
     _, action, raw_id = parts[:3]
@@ -53,8 +53,13 @@ async def handle_photo(update: Update, context: CallbackContext) -> None:
             await update.message.reply_text("Не удалось распознать текст")
             return
         parsed = parser.parse(text, bank=next_task.bank_name, source="ocr")
-        categories = [BankCategory(name=item.category, rate=item.rate) for item in parsed.categories]
-        merged = categories_service.merge_duplicates(categories)
+        if not parsed.categories:
+            await storage.log_ocr(user_id, None, text, parsed.quality)
+            await update.message.reply_text("Не удалось распознать категории")
+            return
+        merged = categories_service.merge_duplicates(
+            BankCategory(name=item.category, rate=item.rate) for item in parsed.categories
+        )
         bank_id = await storage.save_bank(Bank(user_id=user_id, name=bank_name, categories=merged))
         await storage.log_ocr(user_id, bank_id, text, parsed.quality)
         await update.message.reply_text(categories_service.preview(merged))
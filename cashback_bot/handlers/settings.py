@@ -27,10 +27,9 @@ async def handle_settings_toggle(update: Update, context: CallbackContext) -> No
     if not query or not query.data:
         return
     await query.answer()
-    parts = query.data.split(":")
-    if len(parts) < 2:
+    _, _, toggle = query.data.partition(":")
+    if not toggle:
         return
-    toggle = parts[1]
     user_id = context.user_data.get("user_id")
     settings = await storage.load_settings(user_id)
     if toggle == "daily":
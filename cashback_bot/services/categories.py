@@ -16,9 +16,6 @@ class CategoryService:
             if key in merged:
                 existing = merged[key]
                 existing.rate = max(existing.rate, category.rate)
-                source_names = existing.merged_from or [existing.name]
-                source_names.append(category.name)
-                existing.merged_from = list({*source_names})
                 synonyms[key].append(category.name)
             else:
                 merged[key] = category
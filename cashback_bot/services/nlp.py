@@ -2,29 +2,41 @@ from __future__ import annotations
 
 """NLP service for category synonyms and intent understanding."""
 import re
+from types import MappingProxyType
 from typing import Iterable, List, Optional
 
 from ..models.item import CashbackItem
 from .nlp_intents import Intent, IntentBuilder
 
 
+_SYNONYMS = MappingProxyType(
+    {
+        "азс": frozenset({"заправка", "топливо", "fuel"}),
+        "супермаркеты": frozenset({"магазины", "продукты", "groceries"}),
+        "рестораны": frozenset({"кафе", "общепит", "restaurants"}),
+        "аптеки": frozenset({"лекарства", "pharmacy"}),
+        "путешествия": frozenset({"travel", "авиабилеты", "отели"}),
+    }
+)
+# Reverse index so a lookup is one dict probe instead of a scan over every synonym set.
+_CANONICAL_BY_ALIAS = MappingProxyType(
+    {
+        alias: canonical
+        for canonical, synonyms in reversed(_SYNONYMS.items())
+        for alias in (canonical, *synonyms)
+    }
+)
+
+
 class NLPService:
     def __init__(self) -> None:
         self._intent_builder = IntentBuilder()
-        self._synonyms = {
-            "азс": {"заправка", "топливо", "fuel"},
-            "супермаркеты": {"магазины", "продукты", "groceries"},
-            "рестораны": {"кафе", "общепит", "restaurants"},
-            "аптеки": {"лекарства", "pharmacy"},
-            "путешествия": {"travel", "авиабилеты", "отели"},
-        }
+        self._synonyms = _SYNONYMS
+        self._canonical_by_alias = _CANONICAL_BY_ALIAS
 
     def normalize_category(self, name: str) -> str:
         key = name.strip().lower()
-        for canonical, synonyms in self._synonyms.items():
-            if key == canonical or key in synonyms:
-                return canonical
-        return key
+        return self._canonical_by_alias.get(key, key)
 
     def expand_synonyms(self, categories: Iterable[CashbackItem]) -> List[CashbackItem]:
         expanded: List[CashbackItem] = []
@@ -10,6 +10,7 @@ from ..models.parsed_result import ParsedResult
 
 class ParserService:
     CATEGORY_PATTERN = re.compile(r"(?P<name>[\w\sА-Яа-яёЁ&]+)\s*[-:]*\s*(?P<rate>\d+[\.,]?\d*)\s*%")
+    LINE_SEPARATOR = re.compile(r"[-:]")
 
     def parse(self, text: str, *, bank: str, source: str = "ocr") -> ParsedResult:
         categories: List[CashbackItem] = []
@@ -25,7 +26,7 @@ class ParserService:
     def _parse_lines(self, lines: Iterable[str], *, bank: str, source: str) -> List[CashbackItem]:
         items: List[CashbackItem] = []
         for raw in lines:
-            parts = re.split(r"-|:", raw)
+            parts = self.LINE_SEPARATOR.split(raw, maxsplit=2)
             if len(parts) < 2:
                 continue
             name = parts[0].strip()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 """Bank ranking and analytics."""
-from collections import defaultdict
+from collections import Counter, defaultdict
 from typing import Dict, List, Tuple
 
 from ..models.item import CashbackItem
@@ -14,27 +14,20 @@ class RankingService:
             grouped[item.bank].append(item)
         return grouped
 
+    def _rate_totals(self, items: List[CashbackItem]) -> Counter[str]:
+        totals: Counter[str] = Counter()
+        for item in items:
+            totals[item.bank] += item.rate
+        return totals
+
     def best_overall_bank(self, items: List[CashbackItem]) -> Tuple[str, float]:
-        grouped = self._group_by_bank(items)
-        best_bank = ""
-        best_rate = -1.0
-        for bank, bank_items in grouped.items():
-            rate = sum(item.rate for item in bank_items)
-            if rate > best_rate:
-                best_bank = bank
-                best_rate = rate
-        return best_bank, best_rate
+        totals = self._rate_totals(items)
+        if not totals:
+            return "", -1.0
+        return max(totals.items(), key=lambda entry: entry[1])
 
     def best_by_total_percent(self, items: List[CashbackItem]) -> Tuple[str, float]:
-        grouped = self._group_by_bank(items)
-        best_bank = ""
-        best_sum = -1.0
-        for bank, bank_items in grouped.items():
-            total = sum(item.rate for item in bank_items)
-            if total > best_sum:
-                best_bank = bank
-                best_sum = total
-        return best_bank, best_sum
+        return self.best_overall_bank(items)
 
     def missing_categories(self, items: List[CashbackItem], desired: List[str]) -> List[str]:
         existing = {item.normalized_category() for item in items}
@@ -3,9 +3,11 @@ from __future__ import annotations
 
 import logging
 from dataclasses import dataclass
-from typing import Any, Iterable, Sequence
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Sequence
 
 from telegram import CallbackQuery, Update
+from telegram.constants import ChatAction
 from telegram.ext import (
     AIORateLimiter,
     Application,
@@ -63,13 +65,107 @@ TOP_BANKS: Sequence[dict[str, Any]] = (
 )
 
 
-@dataclass
+LayoutSpec = tuple[tuple[tuple[str, str], ...], ...]
+
+LAYOUT_MAIN_MENU: LayoutSpec = (
+    (("menu_wizard", f"nav:{NAV_WIZARD}"),),
+    (("menu_analytics_pro", f"nav:{NAV_ANALYTICS_PRO}"),),
+    (("menu_recommendations", f"nav:{NAV_RECOMMENDATIONS}"),),
+    (("menu_history", f"nav:{NAV_HISTORY}"),),
+    (("menu_profile", f"nav:{NAV_PROFILE}"),),
+    (("menu_settings", f"nav:{NAV_SETTINGS}"),),
+)
+LAYOUT_BACK_MAIN: LayoutSpec = ((("button_back", f"nav:{NAV_MAIN}"),),)
+LAYOUT_BACK_TEMPLATES: LayoutSpec = ((("button_back", f"nav:{NAV_TEMPLATES}"),),)
+LAYOUT_BACK_TEMPLATES_WIZARD: LayoutSpec = ((("button_back", f"nav:{NAV_TEMPLATES}:wizard"),),)
+LAYOUT_BACK_HISTORY: LayoutSpec = ((("button_back", f"nav:{NAV_HISTORY}"),),)
+LAYOUT_BACK_WIZARD: LayoutSpec = ((("button_back", f"nav:{NAV_WIZARD}"),),)
+LAYOUT_BACK_WIZARD_SELECT: LayoutSpec = ((("button_back", f"nav:{NAV_WIZARD}:select_bank"),),)
+LAYOUT_BACK_WIZARD_PREVIEW: LayoutSpec = ((("button_back", f"nav:{NAV_WIZARD}:preview"),),)
+LAYOUT_HISTORY: LayoutSpec = (
+    (("button_back", f"nav:{NAV_MAIN}"),),
+    (("button_delete", "action:history_clear"),),
+)
+LAYOUT_WIZARD_INPUT: LayoutSpec = (
+    (("wizard_input_photo", "action:wizard_input:photo"),),
+    (("wizard_input_text", "action:wizard_input:text"),),
+    (("wizard_input_template", f"nav:{NAV_TEMPLATES}:wizard"),),
+    (("button_cancel", "action:wizard_cancel"),),
+)
+LAYOUT_WIZARD_INPUT_WITH_BACK: LayoutSpec = (
+    (("wizard_input_photo", "action:wizard_input:photo"),),
+    (("wizard_input_text", "action:wizard_input:text"),),
+    (("wizard_input_template", f"nav:{NAV_TEMPLATES}:wizard"),),
+    (("button_back", f"nav:{NAV_WIZARD}:select_bank"),),
+    (("button_cancel", "action:wizard_cancel"),),
+)
+LAYOUT_WIZARD_EXPECT: LayoutSpec = (
+    (("button_back", f"nav:{NAV_WIZARD}:input_mode"),),
+    (("button_cancel", "action:wizard_cancel"),),
+)
+LAYOUT_WIZARD_EXPECT_SKIP: LayoutSpec = (
+    (("button_back", f"nav:{NAV_WIZARD}:input_mode"),),
+    (("button_skip", f"nav:{NAV_WIZARD}:preview"),),
+    (("button_cancel", "action:wizard_cancel"),),
+)
+LAYOUT_WIZARD_EDIT: LayoutSpec = (
+    (("button_back", f"nav:{NAV_WIZARD}:preview"),),
+    (("button_cancel", "action:wizard_cancel"),),
+)
+LAYOUT_WIZARD_PREVIEW: LayoutSpec = (
+    (("button_back", f"nav:{NAV_WIZARD}:input_mode"),),
+    (("button_edit", "action:wizard_edit"),),
+    (("button_confirm", "action:wizard_confirm"),),
+    (("button_cancel", "action:wizard_cancel"),),
+)
+LAYOUT_NOTIFICATIONS: LayoutSpec = (
+    (("notifications_monthly", "action:notifications_toggle:monthly"),),
+    (("notifications_warning", "action:notifications_toggle:warning"),),
+    (("notifications_critical", "action:notifications_toggle:critical"),),
+    (("button_back", f"nav:{NAV_MAIN}"),),
+)
+
+# Wizard steps that are a single prompt over a static keyboard.
+WIZARD_STEP_PROMPTS: dict[str, tuple[str, LayoutSpec]] = {
+    "custom_name": ("wizard_enter_name", LAYOUT_BACK_WIZARD_SELECT),
+    "input_mode": ("wizard_choose_input", LAYOUT_WIZARD_INPUT_WITH_BACK),
+    "input_photo": ("wizard_expect_photo", LAYOUT_WIZARD_EXPECT_SKIP),
+    "input_text": ("wizard_expect_text", LAYOUT_WIZARD_EXPECT_SKIP),
+}
+
+
+@dataclass(slots=True)
 class CallbackCommand:
     kind: str
     parts: list[str]
 
 
-async def ensure_user(context: ContextTypes.DEFAULT_TYPE, update_or_query: Update | CallbackQuery) -> int:
+@dataclass(slots=True)
+class ChatState:
+    """Per-user conversation flags kept in ``context.user_data``."""
+
+    user_id: int | None = None
+    wizard_expect: str | None = None
+    templates_for_wizard: bool = False
+    awaiting_template: dict[str, Any] | None = None
+
+
+def chat_state(context: ContextTypes.DEFAULT_TYPE) -> ChatState:
+    state = context.user_data.get("chat_state")
+    if state is None:
+        state = context.user_data["chat_state"] = ChatState()
+    return state
+
+
+async def ensure_user(
+    context: ContextTypes.DEFAULT_TYPE,
+    update_or_query: Update | CallbackQuery,
+    state: ChatState | None = None,
+) -> int:
+    if state is None:
+        state = chat_state(context)
+    if state.user_id is not None:
+        return state.user_id
     db: AsyncDatabase = context.application.bot_data["db"]
     translator: Translator = context.application.bot_data["translator"]
     locale = context.user_data.get("locale") or translator.default_locale
@@ -80,13 +176,30 @@ async def ensure_user(context: ContextTypes.DEFAULT_TYPE, update_or_query: Updat
     if not telegram_user:
         raise RuntimeError("Cannot resolve user")
     user_id = await db.upsert_user(telegram_user.id, locale)
-    context.user_data["user_id"] = user_id
+    state.user_id = user_id
     return user_id
 
 
 def parse_callback_data(data: str) -> CallbackCommand:
-    parts = data.split(":")
-    return CallbackCommand(kind=parts[0], parts=parts[1:])
+    kind, _, payload = data.partition(":")
+    return CallbackCommand(kind=kind, parts=payload.split(":") if payload else [])
+
+
+@lru_cache(maxsize=256)
+def localize_layout(
+    translator: Translator, locale: str, layout: LayoutSpec
+) -> tuple[tuple[ButtonSpec, ...], ...]:
+    """Resolve a static layout for ``locale``; results are cached and immutable."""
+
+    return tuple(
+        tuple(ButtonSpec(translator.translate(key, locale), callback_data) for key, callback_data in row)
+        for row in layout
+    )
+
+
+@lru_cache(maxsize=128)
+def screen_header(translator: Translator, locale: str, key: str) -> str:
+    return f"<b>{translator.translate(key, locale)}</b>"
 
 
 def get_locale(context: ContextTypes.DEFAULT_TYPE) -> str:
@@ -106,26 +219,7 @@ async def show_main_screen(
 ) -> None:
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    keyboard = [
-        [
-            ButtonSpec(translator.translate("menu_wizard", locale), f"nav:{NAV_WIZARD}"),
-        ],
-        [
-            ButtonSpec(translator.translate("menu_analytics_pro", locale), f"nav:{NAV_ANALYTICS_PRO}"),
-        ],
-        [
-            ButtonSpec(translator.translate("menu_recommendations", locale), f"nav:{NAV_RECOMMENDATIONS}"),
-        ],
-        [
-            ButtonSpec(translator.translate("menu_history", locale), f"nav:{NAV_HISTORY}"),
-        ],
-        [
-            ButtonSpec(translator.translate("menu_profile", locale), f"nav:{NAV_PROFILE}"),
-        ],
-        [
-            ButtonSpec(translator.translate("menu_settings", locale), f"nav:{NAV_SETTINGS}"),
-        ],
-    ]
+    keyboard = localize_layout(translator, locale, LAYOUT_MAIN_MENU)
     text = translator.translate("screen_main", locale)
     if intro:
         text = f"{translator.translate('start_message', locale)}\n\n{text}"
@@ -138,14 +232,9 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return
     await query.answer()
     command = parse_callback_data(query.data or "")
-    if command.kind == "nav":
-        await handle_navigation(query, context, command.parts)
-    elif command.kind == "action":
-        await handle_action(query, context, command.parts)
-    elif command.kind == "edit":
-        await handle_edit(query, context, command.parts)
-    elif command.kind == "del":
-        await handle_delete(query, context, command.parts)
+    handler = _CALLBACK_HANDLERS.get(command.kind)
+    if handler is not None:
+        await handler(query, context, command.parts)
 
 
 async def handle_navigation(
@@ -153,25 +242,9 @@ async def handle_navigation(
 ) -> None:
     if not parts:
         return
-    screen = parts[0]
-    if screen == NAV_MAIN:
-        await show_main_screen(query, context)
-    elif screen == NAV_WIZARD:
-        step = parts[1] if len(parts) > 1 else None
-        await show_wizard(query, context, step)
-    elif screen == NAV_ANALYTICS_PRO:
-        await show_analytics_pro(query, context)
-    elif screen == NAV_RECOMMENDATIONS:
-        await show_recommendations(query, context)
-    elif screen == NAV_HISTORY:
-        await show_history_screen(query, context)
-    elif screen == NAV_PROFILE:
-        await show_profile_screen(query, context)
-    elif screen == NAV_SETTINGS:
-        await show_settings_screen(query, context)
-    elif screen == NAV_TEMPLATES:
-        context.user_data["templates_for_wizard"] = len(parts) > 1 and parts[1] == "wizard"
-        await show_templates_screen(query, context)
+    handler = _NAV_HANDLERS.get(parts[0])
+    if handler is not None:
+        await handler(query, context, parts)
 
 
 async def handle_action(
@@ -179,27 +252,9 @@ async def handle_action(
 ) -> None:
     if not parts:
         return
-    action = parts[0]
-    if action == "wizard_bank":
-        await handle_wizard_bank_selection(query, context, parts)
-    elif action == "wizard_other":
-        await handle_wizard_other(query, context)
-    elif action == "wizard_input":
-        await handle_wizard_input(query, context, parts)
-    elif action == "wizard_confirm":
-        await handle_wizard_confirm(query, context)
-    elif action == "wizard_edit":
-        await handle_wizard_edit(query, context)
-    elif action == "wizard_cancel":
-        await handle_wizard_cancel(query, context)
-    elif action == "history_clear":
-        await clear_history(query, context)
-    elif action == "notifications_toggle":
-        await toggle_notification(query, context, parts)
-    elif action == "template_new":
-        await prompt_new_template(query, context)
-    elif action == "template_use":
-        await handle_template_use(query, context, parts)
+    handler = _ACTION_HANDLERS.get(parts[0])
+    if handler is not None:
+        await handler(query, context, parts)
 
 
 async def handle_edit(
@@ -230,73 +285,46 @@ async def show_wizard(
     translator: Translator = context.application.bot_data["translator"]
     wizard: WizardService = context.application.bot_data["wizard"]
     locale = get_locale(context)
-    user_id = await ensure_user(context, source)
+    t = translator.bind(locale)
+    state = chat_state(context)
+    user_id = await ensure_user(context, source, state)
     data = await wizard.load(user_id)
     if step_override:
         data.step = step_override
         await wizard.update(data)
     step = data.step
     if step == "select_bank":
-        keyboard_rows: list[list[ButtonSpec]] = []
+        keyboard_rows: list[Sequence[ButtonSpec]] = []
         for bank in context.application.bot_data["top_bank_index"]:
             label = bank["translations"].get(locale, bank["name"])
             keyboard_rows.append([ButtonSpec(label, f"action:wizard_bank:{bank['id']}")])
         keyboard_rows.append([
-            ButtonSpec(translator.translate("wizard_other", locale), "action:wizard_other"),
+            ButtonSpec(t("wizard_other"), "action:wizard_other"),
         ])
         keyboard_rows.append([
-            ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel"),
+            ButtonSpec(t("button_cancel"), "action:wizard_cancel"),
         ])
         await render_screen(
             source,
             context,
-            translator.translate("wizard_select_bank", locale),
+            t("wizard_select_bank"),
             keyboard=keyboard_rows,
         )
-    elif step == "custom_name":
-        context.user_data["wizard_expect"] = "bank_name"
-        await render_screen(
-            source,
-            context,
-            translator.translate("wizard_enter_name", locale),
-            keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:select_bank")]],
-        )
-    elif step == "input_mode":
-        keyboard = [
-            [ButtonSpec(translator.translate("wizard_input_photo", locale), "action:wizard_input:photo")],
-            [ButtonSpec(translator.translate("wizard_input_text", locale), "action:wizard_input:text")],
-            [ButtonSpec(translator.translate("wizard_input_template", locale), f"nav:{NAV_TEMPLATES}:wizard")],
-            [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:select_bank")],
-            [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-        ]
-        await render_screen(
-            source,
-            context,
-            translator.translate("wizard_choose_input", locale),
-            keyboard=keyboard,
-        )
-    elif step in {"input_photo", "input_text"}:
-        key = "wizard_expect_photo" if step == "input_photo" else "wizard_expect_text"
-        keyboard = [
-            [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:input_mode")],
-            [ButtonSpec(translator.translate("button_skip", locale), f"nav:{NAV_WIZARD}:preview")],
-            [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-        ]
+    elif step in WIZARD_STEP_PROMPTS:
+        if step == "custom_name":
+            state.wizard_expect = "bank_name"
+        prompt_key, layout = WIZARD_STEP_PROMPTS[step]
         await render_screen(
             source,
             context,
-            translator.translate(key, locale),
-            keyboard=keyboard,
+            t(prompt_key),
+            keyboard=localize_layout(translator, locale, layout),
         )
     elif step == "preview":
         text = build_wizard_preview(data, translator, locale)
-        keyboard = [
-            [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:input_mode")],
-            [ButtonSpec(translator.translate("button_edit", locale), "action:wizard_edit")],
-            [ButtonSpec(translator.translate("button_confirm", locale), "action:wizard_confirm")],
-            [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-        ]
-        await render_screen(source, context, text, keyboard=keyboard)
+        await render_screen(
+            source, context, text, keyboard=localize_layout(translator, locale, LAYOUT_WIZARD_PREVIEW)
+        )
 
 
 def build_wizard_preview(data: WizardData, translator: Translator, locale: str) -> str:
@@ -306,10 +334,12 @@ def build_wizard_preview(data: WizardData, translator: Translator, locale: str)
     if not data.categories:
         lines.append(translator.translate("wizard_no_categories", locale))
         return "\n".join(lines)
-    for entry in data.categories:
-        rate = float(entry.get("rate", 0.0)) * 100
-        level = int(entry.get("level", 1))
-        lines.append(f"• L{level} {entry.get('name')}: {rate:.2f}%")
+    lines.extend(
+        [
+            f"• L{int(entry.get('level', 1))} {entry.get('name')}: {float(entry.get('rate', 0.0)) * 100:.2f}%"
+            for entry in data.categories
+        ]
+    )
     return "\n".join(lines)
 
 
@@ -335,12 +365,7 @@ async def handle_wizard_bank_selection(
         query,
         context,
         translator.translate("wizard_choose_input", locale),
-        keyboard=[
-            [ButtonSpec(translator.translate("wizard_input_photo", locale), "action:wizard_input:photo")],
-            [ButtonSpec(translator.translate("wizard_input_text", locale), "action:wizard_input:text")],
-            [ButtonSpec(translator.translate("wizard_input_template", locale), f"nav:{NAV_TEMPLATES}:wizard")],
-            [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-        ],
+        keyboard=localize_layout(translator, locale, LAYOUT_WIZARD_INPUT),
     )
 
 
@@ -364,34 +389,29 @@ async def handle_wizard_input(
     wizard: WizardService = context.application.bot_data["wizard"]
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    user_id = await ensure_user(context, query)
+    state = chat_state(context)
+    user_id = await ensure_user(context, query, state)
     data = await wizard.load(user_id)
     data.input_mode = mode
     if mode == "photo":
         data.step = "input_photo"
-        context.user_data["wizard_expect"] = "photo"
+        state.wizard_expect = "photo"
         await wizard.update(data)
         await render_screen(
             query,
             context,
             translator.translate("wizard_expect_photo", locale),
-            keyboard=[
-                [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:input_mode")],
-                [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-            ],
+            keyboard=localize_layout(translator, locale, LAYOUT_WIZARD_EXPECT),
         )
     elif mode == "text":
         data.step = "input_text"
-        context.user_data["wizard_expect"] = "text"
+        state.wizard_expect = "text"
         await wizard.update(data)
         await render_screen(
             query,
             context,
             translator.translate("wizard_expect_text", locale),
-            keyboard=[
-                [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:input_mode")],
-                [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-            ],
+            keyboard=localize_layout(translator, locale, LAYOUT_WIZARD_EXPECT),
         )
 
 
@@ -399,19 +419,17 @@ async def handle_wizard_edit(query: CallbackQuery, context: ContextTypes.DEFAULT
     wizard: WizardService = context.application.bot_data["wizard"]
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    user_id = await ensure_user(context, query)
+    state = chat_state(context)
+    user_id = await ensure_user(context, query, state)
     data = await wizard.load(user_id)
     data.step = "input_text"
     await wizard.update(data)
-    context.user_data["wizard_expect"] = "text"
+    state.wizard_expect = "text"
     await render_screen(
         query,
         context,
         translator.translate("wizard_expect_text", locale),
-        keyboard=[
-            [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:preview")],
-            [ButtonSpec(translator.translate("button_cancel", locale), "action:wizard_cancel")],
-        ],
+        keyboard=localize_layout(translator, locale, LAYOUT_WIZARD_EDIT),
     )
 
 
@@ -431,7 +449,7 @@ async def handle_wizard_confirm(query: CallbackQuery, context: ContextTypes.DEFA
             query,
             context,
             str(error),
-            keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}:preview")]],
+            keyboard=localize_layout(translator, locale, LAYOUT_BACK_WIZARD_PREVIEW),
         )
         return
     await db.update_last_activity(user_id, bank_update=True)
@@ -441,15 +459,16 @@ async def handle_wizard_confirm(query: CallbackQuery, context: ContextTypes.DEFA
         query,
         context,
         translator.translate("wizard_confirm", locale),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_MAIN),
     )
 
 
 async def handle_wizard_cancel(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     wizard: WizardService = context.application.bot_data["wizard"]
-    user_id = await ensure_user(context, query)
+    state = chat_state(context)
+    user_id = await ensure_user(context, query, state)
     await wizard.cancel(user_id)
-    context.user_data.pop("wizard_expect", None)
+    state.wizard_expect = None
     await show_main_screen(query, context)
 
 
@@ -461,24 +480,24 @@ async def handle_template_use(
     identifier = ":".join(parts[1:])
     template_service: TemplateService = context.application.bot_data["templates"]
     wizard: WizardService = context.application.bot_data["wizard"]
-    user_id = await ensure_user(context, query)
+    state = chat_state(context)
+    user_id = await ensure_user(context, query, state)
     locale = get_locale(context)
-    views = await template_service.list_templates(user_id, locale)
-    selected = next((view for view in views if view.identifier == identifier), None)
+    selected = await template_service.get_template(user_id, locale, identifier)
     translator: Translator = context.application.bot_data["translator"]
     if selected is None:
         await render_screen(
             query,
             context,
             translator.translate("templates_invalid", locale),
-            keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_TEMPLATES}:wizard")]],
+            keyboard=localize_layout(translator, locale, LAYOUT_BACK_TEMPLATES_WIZARD),
         )
         return
     data = await wizard.load(user_id)
     data.categories = wizard.apply_template(selected.payload)
     data.step = "preview"
     await wizard.update(data)
-    context.user_data.pop("templates_for_wizard", None)
+    state.templates_for_wizard = False
     await show_wizard(query, context, "preview")
 
 
@@ -486,55 +505,63 @@ async def show_analytics_pro(source: Update | CallbackQuery, context: ContextTyp
     translator: Translator = context.application.bot_data["translator"]
     analytics: AnalyticsService = context.application.bot_data["analytics"]
     locale = get_locale(context)
+    t = translator.bind(locale)
     user_id = await ensure_user(context, source)
     worst = await analytics.top_worst_categories(user_id)
     buckets = await analytics.top_by_buckets(user_id)
     strengths = await analytics.bank_strength_score(user_id)
     coverage = await analytics.category_coverage_summary(user_id)
-    lines = [f"<b>{translator.translate('analytics_pro_header', locale)}</b>"]
+    lines = [screen_header(translator, locale, "analytics_pro_header")]
     has_data = False
     if worst:
         has_data = True
-        lines.append(translator.translate("analytics_worst_header", locale))
-        for insight in worst:
-            lines.append(f"• {insight.bank_name}: {insight.category} — {insight.rate * 100:.2f}%")
+        lines.append(t("analytics_worst_header"))
+        lines.extend(
+            [f"• {insight.bank_name}: {insight.category} — {insight.rate * 100:.2f}%" for insight in worst]
+        )
     if buckets:
         has_data = True
         lines.append("")
-        lines.append(translator.translate("analytics_bucket_header", locale))
+        lines.append(t("analytics_bucket_header"))
         for bucket, items in buckets.items():
             lines.append(f"{bucket}:")
-            for insight in items[:5]:
-                lines.append(f"  • {insight.bank_name} — {insight.category} ({insight.rate * 100:.2f}%)")
+            lines.extend(
+                [f"  • {insight.bank_name} — {insight.category} ({insight.rate * 100:.2f}%)" for insight in items[:5]]
+            )
     if strengths:
         has_data = True
         lines.append("")
-        lines.append(translator.translate("analytics_strength_header", locale))
-        for strength in strengths:
-            lines.append(
+        lines.append(t("analytics_strength_header"))
+        lines.extend(
+            [
                 f"• {strength.bank_name}: {strength.score} (top={strength.top_categories}, weak={strength.weak_categories})"
-            )
+                for strength in strengths
+            ]
+        )
     if coverage:
         has_data = True
         lines.append("")
-        lines.append(translator.translate("analytics_coverage_header", locale))
-        for item in coverage:
-            lines.append(
-                translator.translate("analytics_coverage_line", locale).format(
+        lines.append(t("analytics_coverage_header"))
+        coverage_line = t("analytics_coverage_line")
+        lines.extend(
+            [
+                coverage_line.format(
                     category=item.category,
                     best_bank=item.best_bank,
                     best_rate=item.best_rate * 100,
                     bank_count=item.bank_count,
                     average_rate=item.average_rate * 100,
                 )
-            )
+                for item in coverage
+            ]
+        )
     if not has_data:
-        lines.append(translator.translate("analytics_no_data", locale))
+        lines.append(t("analytics_no_data"))
     await render_screen(
         source,
         context,
         "\n".join(lines),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_MAIN),
     )
 
 async def show_recommendations(source: Update | CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -542,17 +569,18 @@ async def show_recommendations(source: Update | CallbackQuery, context: ContextT
     recommendations_service: RecommendationService = context.application.bot_data["recommendations"]
     db: AsyncDatabase = context.application.bot_data["db"]
     locale = get_locale(context)
+    t = translator.bind(locale)
     user_id = await ensure_user(context, source)
     rows = await db.fetch_all_category_rates(user_id)
-    lines = [f"<b>{translator.translate('recommendations_header', locale)}</b>"]
+    lines = [screen_header(translator, locale, "recommendations_header")]
     if not rows:
-        lines.append(translator.translate("no_cashback", locale))
+        lines.append(t("no_cashback"))
     else:
         top_category = rows[0]["normalized_name"]
         best = await recommendations_service.recommend_best_card_for(user_id, top_category)
         if best:
             lines.append(
-                translator.translate("recommendation_best_card", locale).format(
+                t("recommendation_best_card").format(
                     category=best.context["category"],
                     bank=best.details,
                     rate=best.context["rate"],
@@ -561,7 +589,7 @@ async def show_recommendations(source: Update | CallbackQuery, context: ContextT
         move = await recommendations_service.recommend_where_to_move_cashback(user_id)
         if move:
             lines.append(
-                translator.translate("recommendation_move", locale).format(
+                t("recommendation_move").format(
                     bank=move.details,
                     category=move.context["category"],
                     rate=move.context["rate"],
@@ -578,7 +606,7 @@ async def show_recommendations(source: Update | CallbackQuery, context: ContextT
             if updates:
                 first = updates[0]
                 lines.append(
-                    translator.translate("recommendation_update", locale).format(
+                    t("recommendation_update").format(
                         category=first.details,
                         rate=first.context["rate"],
                     )
@@ -586,7 +614,7 @@ async def show_recommendations(source: Update | CallbackQuery, context: ContextT
         opportunities = await recommendations_service.recommend_new_category_opportunities(user_id)
         for item in opportunities[:3]:
             lines.append(
-                translator.translate("recommendation_opportunity", locale).format(
+                t("recommendation_opportunity").format(
                     category=item.details,
                     rate=item.context["rate"],
                 )
@@ -595,7 +623,7 @@ async def show_recommendations(source: Update | CallbackQuery, context: ContextT
         source,
         context,
         "\n".join(lines),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_MAIN),
     )
 
 
@@ -605,17 +633,14 @@ async def show_history_screen(source: Update | CallbackQuery, context: ContextTy
     locale = get_locale(context)
     user_id = await ensure_user(context, source)
     entries = await history.list(user_id)
-    lines = [f"<b>{translator.translate('history_header', locale)}</b>"]
+    lines = [screen_header(translator, locale, "history_header")]
     if not entries:
         lines.append(translator.translate("history_empty", locale))
     else:
-        for entry in entries:
-            lines.append(f"• {entry['created_at']}: {entry['action']}")
-    keyboard = [
-        [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")],
-        [ButtonSpec(translator.translate("button_delete", locale), "action:history_clear")],
-    ]
-    await render_screen(source, context, "\n".join(lines), keyboard=keyboard)
+        lines.extend([f"• {entry['created_at']}: {entry['action']}" for entry in entries])
+    await render_screen(
+        source, context, "\n".join(lines), keyboard=localize_layout(translator, locale, LAYOUT_HISTORY)
+    )
 
 
 async def clear_history(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -628,7 +653,7 @@ async def clear_history(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE
         query,
         context,
         translator.translate("history_cleared", locale),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_HISTORY}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_HISTORY),
     )
 
 
@@ -640,7 +665,7 @@ async def show_profile_screen(source: Update | CallbackQuery, context: ContextTy
     profile = await gamification.profile(user_id)
     text = "\n".join(
         [
-            f"<b>{translator.translate('profile_header', locale)}</b>",
+            screen_header(translator, locale, "profile_header"),
             translator.translate("profile_points", locale).format(points=profile.points),
             translator.translate("profile_level", locale).format(level=profile.level),
         ]
@@ -649,7 +674,7 @@ async def show_profile_screen(source: Update | CallbackQuery, context: ContextTy
         source,
         context,
         text,
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_MAIN),
     )
 
 
@@ -659,13 +684,9 @@ async def show_settings_screen(source: Update | CallbackQuery, context: ContextT
     locale = get_locale(context)
     user_id = await ensure_user(context, source)
     text = await notification_service.render_settings(user_id, locale)
-    keyboard = [
-        [ButtonSpec(translator.translate("notifications_monthly", locale), "action:notifications_toggle:monthly")],
-        [ButtonSpec(translator.translate("notifications_warning", locale), "action:notifications_toggle:warning")],
-        [ButtonSpec(translator.translate("notifications_critical", locale), "action:notifications_toggle:critical")],
-        [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")],
-    ]
-    await render_screen(source, context, text, keyboard=keyboard)
+    await render_screen(
+        source, context, text, keyboard=localize_layout(translator, locale, LAYOUT_NOTIFICATIONS)
+    )
 
 
 async def toggle_notification(
@@ -698,12 +719,7 @@ async def toggle_notification(
         query,
         context,
         await notification_service.render_settings(user_id, locale),
-        keyboard=[
-            [ButtonSpec(translator.translate("notifications_monthly", locale), "action:notifications_toggle:monthly")],
-            [ButtonSpec(translator.translate("notifications_warning", locale), "action:notifications_toggle:warning")],
-            [ButtonSpec(translator.translate("notifications_critical", locale), "action:notifications_toggle:critical")],
-            [ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_MAIN}")],
-        ],
+        keyboard=localize_layout(translator, locale, LAYOUT_NOTIFICATIONS),
     )
 
 
@@ -711,38 +727,42 @@ async def show_templates_screen(source: Update | CallbackQuery, context: Context
     template_service: TemplateService = context.application.bot_data["templates"]
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    user_id = await ensure_user(context, source)
-    for_wizard = context.user_data.get("templates_for_wizard", False)
+    t = translator.bind(locale)
+    state = chat_state(context)
+    user_id = await ensure_user(context, source, state)
+    for_wizard = state.templates_for_wizard
     views = await template_service.list_templates(user_id, locale)
-    lines = [f"<b>{translator.translate('templates_header', locale)}</b>"]
-    keyboard: list[list[ButtonSpec]] = []
+    lines = [screen_header(translator, locale, "templates_header")]
+    keyboard: list[Sequence[ButtonSpec]] = []
     if not views:
-        lines.append(translator.translate("templates_empty", locale))
+        lines.append(t("templates_empty"))
     for view in views:
         lines.append(f"• {view.title}")
         if for_wizard:
             keyboard.append([ButtonSpec(view.title, f"action:template_use:{view.identifier}")])
         elif not view.is_default:
-            template_id = view.identifier.split(":", 1)[1]
+            _, _, template_id = view.identifier.partition(":")
             keyboard.append([
-                ButtonSpec(translator.translate("button_edit", locale), f"edit:template:{template_id}"),
-                ButtonSpec(translator.translate("button_delete", locale), f"del:template:{template_id}"),
+                ButtonSpec(t("button_edit"), f"edit:template:{template_id}"),
+                ButtonSpec(t("button_delete"), f"del:template:{template_id}"),
             ])
     if not for_wizard:
-        keyboard.append([ButtonSpec(translator.translate("templates_add", locale), "action:template_new")])
-    keyboard.append([ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_WIZARD}" if for_wizard else f"nav:{NAV_MAIN}")])
+        keyboard.append([ButtonSpec(t("templates_add"), "action:template_new")])
+    keyboard.extend(
+        localize_layout(translator, locale, LAYOUT_BACK_WIZARD if for_wizard else LAYOUT_BACK_MAIN)
+    )
     await render_screen(source, context, "\n".join(lines), keyboard=keyboard)
 
 
 async def prompt_new_template(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE) -> None:
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    context.user_data["awaiting_template"] = {"mode": "create"}
+    chat_state(context).awaiting_template = {"mode": "create"}
     await render_screen(
         query,
         context,
         translator.translate("templates_prompt_new", locale),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_TEMPLATES}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_TEMPLATES),
     )
 
 
@@ -751,12 +771,12 @@ async def prompt_edit_template(
 ) -> None:
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    context.user_data["awaiting_template"] = {"mode": "edit", "id": template_id}
+    chat_state(context).awaiting_template = {"mode": "edit", "id": template_id}
     await render_screen(
         query,
         context,
         translator.translate("templates_prompt_new", locale),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_TEMPLATES}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_TEMPLATES),
     )
 
 
@@ -770,7 +790,7 @@ async def delete_template(query: CallbackQuery, context: ContextTypes.DEFAULT_TY
         query,
         context,
         translator.translate("templates_deleted", locale),
-        keyboard=[[ButtonSpec(translator.translate("button_back", locale), f"nav:{NAV_TEMPLATES}")]],
+        keyboard=localize_layout(translator, locale, LAYOUT_BACK_TEMPLATES),
     )
 
 
@@ -787,75 +807,78 @@ def parse_template_input(text: str) -> tuple[str, list[str]] | None:
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
-    expect = context.user_data.get("wizard_expect")
-    if expect != "photo":
+    state = chat_state(context)
+    if state.wizard_expect != "photo":
         await update.message.reply_text(translator.translate("status_processing", locale))
         return
     wizard: WizardService = context.application.bot_data["wizard"]
     ocr: OCRService = context.application.bot_data["ocr"]
-    user_id = await ensure_user(context, update)
+    user_id = await ensure_user(context, update, state)
     photo = update.message.photo[-1]
     file = await photo.get_file()
     image_bytes = await file.download_as_bytearray()
-    await render_screen(update, context, translator.translate("status_ocr", locale))
+    # The preview screen is the only message sent; a chat action covers the OCR wait.
+    await update.message.chat.send_action(ChatAction.TYPING)
     text = await ocr.read_text(bytes(image_bytes))
-    if not text:
+    categories = wizard.parse_categories_text(text) if text else []
+    if not categories:
+        # Nothing usable was recognised; leave the wizard session untouched.
         await update.message.reply_text(translator.translate("ocr_failed", locale))
         return
-    categories = wizard.parse_categories_text(text)
     data = await wizard.load(user_id)
     data.categories = categories
     data.step = "preview"
     await wizard.update(data)
-    context.user_data.pop("wizard_expect", None)
+    state.wizard_expect = None
     await show_wizard(update, context, "preview")
 
 
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     translator: Translator = context.application.bot_data["translator"]
     locale = get_locale(context)
+    t = translator.bind(locale)
     text = update.message.text
-    awaiting = context.user_data.get("wizard_expect")
+    state = chat_state(context)
+    awaiting = state.wizard_expect
+    wizard: WizardService = context.application.bot_data["wizard"]
     if awaiting == "bank_name":
-        wizard: WizardService = context.application.bot_data["wizard"]
-        user_id = await ensure_user(context, update)
+        user_id = await ensure_user(context, update, state)
         data = await wizard.load(user_id)
         data.bank_name = text.strip()
         data.step = "input_mode"
         await wizard.update(data)
-        context.user_data.pop("wizard_expect", None)
+        state.wizard_expect = None
         await show_wizard(update, context, "input_mode")
         return
     if awaiting == "text":
-        wizard: WizardService = context.application.bot_data["wizard"]
-        user_id = await ensure_user(context, update)
+        user_id = await ensure_user(context, update, state)
         categories = wizard.parse_categories_text(text)
         if not categories:
-            await update.message.reply_text(translator.translate("manual_format_error", locale))
+            await update.message.reply_text(t("manual_format_error"))
             return
         data = await wizard.load(user_id)
         data.categories = categories
         data.step = "preview"
         await wizard.update(data)
-        context.user_data.pop("wizard_expect", None)
+        state.wizard_expect = None
         await show_wizard(update, context, "preview")
         return
-    template_context = context.user_data.get("awaiting_template")
+    template_context = state.awaiting_template
     if template_context:
         parsed = parse_template_input(text)
         if not parsed:
-            await update.message.reply_text(translator.translate("templates_invalid", locale))
+            await update.message.reply_text(t("templates_invalid"))
             return
         name, fields = parsed
         template_service: TemplateService = context.application.bot_data["templates"]
-        user_id = await ensure_user(context, update)
+        user_id = await ensure_user(context, update, state)
         payload = {"fields": fields}
         if template_context["mode"] == "edit":
-            await template_service.upsert_template(user_id, "custom", name, payload, template_context["id"])
+            await template_service.update_template(user_id, template_context["id"], "custom", name, payload)
         else:
-            await template_service.upsert_template(user_id, "custom", name, payload)
-        context.user_data.pop("awaiting_template", None)
-        await update.message.reply_text(translator.translate("templates_saved", locale))
+            await template_service.insert_template(user_id, "custom", name, payload)
+        state.awaiting_template = None
+        await update.message.reply_text(t("templates_saved"))
         await show_templates_screen(update, context)
         return
     nlp: NLPService = context.application.bot_data["nlp"]
@@ -867,7 +890,53 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     elif intent == "profile":
         await show_profile_screen(update, context)
     else:
-        await update.message.reply_text(translator.translate("unknown", locale))
+        await update.message.reply_text(t("unknown"))
+
+
+# --- Callback routing -----------------------------------------------------------
+
+CallbackHandler = Callable[[CallbackQuery, ContextTypes.DEFAULT_TYPE, Sequence[str]], Awaitable[None]]
+
+
+async def _nav_wizard(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE, parts: Sequence[str]) -> None:
+    await show_wizard(query, context, parts[1] if len(parts) > 1 else None)
+
+
+async def _nav_templates(query: CallbackQuery, context: ContextTypes.DEFAULT_TYPE, parts: Sequence[str]) -> None:
+    chat_state(context).templates_for_wizard = len(parts) > 1 and parts[1] == "wizard"
+    await show_templates_screen(query, context)
+
+
+_NAV_HANDLERS: dict[str, CallbackHandler] = {
+    NAV_MAIN: lambda query, context, parts: show_main_screen(query, context),
+    NAV_WIZARD: _nav_wizard,
+    NAV_ANALYTICS_PRO: lambda query, context, parts: show_analytics_pro(query, context),
+    NAV_RECOMMENDATIONS: lambda query, context, parts: show_recommendations(query, context),
+    NAV_HISTORY: lambda query, context, parts: show_history_screen(query, context),
+    NAV_PROFILE: lambda query, context, parts: show_profile_screen(query, context),
+    NAV_SETTINGS: lambda query, context, parts: show_settings_screen(query, context),
+    NAV_TEMPLATES: _nav_templates,
+}
+
+_ACTION_HANDLERS: dict[str, CallbackHandler] = {
+    "wizard_bank": handle_wizard_bank_selection,
+    "wizard_other": lambda query, context, parts: handle_wizard_other(query, context),
+    "wizard_input": handle_wizard_input,
+    "wizard_confirm": lambda query, context, parts: handle_wizard_confirm(query, context),
+    "wizard_edit": lambda query, context, parts: handle_wizard_edit(query, context),
+    "wizard_cancel": lambda query, context, parts: handle_wizard_cancel(query, context),
+    "history_clear": lambda query, context, parts: clear_history(query, context),
+    "notifications_toggle": toggle_notification,
+    "template_new": lambda query, context, parts: prompt_new_template(query, context),
+    "template_use": handle_template_use,
+}
+
+_CALLBACK_HANDLERS: dict[str, CallbackHandler] = {
+    "nav": handle_navigation,
+    "action": handle_action,
+    "edit": handle_edit,
+    "del": handle_delete,
+}
 
 
 async def reminder_callback(application: Application) -> None:
@@ -879,7 +948,9 @@ async def on_startup(application: Application) -> None:
     config: BotConfig = application.bot_data["config"]
     db: AsyncDatabase = application.bot_data["db"]
     await db.init()
-    top_bank_index = []
+    normalizer: CategoryNormalizer = application.bot_data["normalizer"]
+    await db.sync_category_aliases(normalizer.aliases)
+    top_bank_index: list[dict[str, Any]] = []
     for bank in TOP_BANKS:
         bank_id = await db.ensure_bank(bank["name"], bank.get("translations"))
         entry = {"id": bank_id, "name": bank["name"], "translations": bank.get("translations", {})}
@@ -899,6 +970,8 @@ async def on_shutdown(application: Application) -> None:
     await scheduler.stop()
     ocr: OCRService = application.bot_data["ocr"]
     await ocr.close()
+    db: AsyncDatabase = application.bot_data["db"]
+    await db.close()
 
 
 def create_application() -> Application:
@@ -906,7 +979,7 @@ def create_application() -> Application:
     translator = Translator(default_locale=config.locale)
     normalizer = CategoryNormalizer()
     nlp_service = NLPService(normalizer)
-    db = AsyncDatabase(config.database_path)
+    db = AsyncDatabase(config.database_path, activity_retention=config.max_history_records)
     ocr_service = OCRService(config.ocr_temp_dir, primary_lang=config.ocr_primary_lang, secondary_lang=config.ocr_secondary_lang)
     scheduler = ReminderScheduler(config.timezone)
     template_service = TemplateService(db)
@@ -931,6 +1004,7 @@ def create_application() -> Application:
             "config": config,
             "translator": translator,
             "nlp": nlp_service,
+            "normalizer": normalizer,
             "db": db,
             "ocr": ocr_service,
             "scheduler": scheduler,
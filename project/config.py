@@ -5,10 +5,10 @@ import logging
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Mapping, Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BotConfig:
     """Runtime configuration loaded from environment variables."""
 
@@ -26,8 +26,8 @@ class BotConfig:
     max_history_records: int
 
 
-def _get_bool(name: str, default: bool) -> bool:
-    value = os.getenv(name)
+def _get_bool(environ: Mapping[str, str], name: str, default: bool) -> bool:
+    value = environ.get(name)
     if value is None:
         return default
     return value.strip().lower() in {"1", "true", "yes", "on"}
@@ -50,7 +50,7 @@ def load_config(env: Optional[dict[str, str]] = None) -> BotConfig:
     db_path = Path(environ.get("DB_PATH", "./data/cashback.sqlite3")).expanduser().resolve()
     ocr_temp_dir = Path(environ.get("OCR_TEMP_DIR", "./tmp/ocr"))
     locale = environ.get("DEFAULT_LOCALE", "en").lower()
-    enable_notifications = _get_bool("ENABLE_NOTIFICATIONS", True)
+    enable_notifications = _get_bool(environ, "ENABLE_NOTIFICATIONS", True)
     analytics_window_days = int(environ.get("ANALYTICS_WINDOW_DAYS", "90"))
     timezone = environ.get("BOT_TIMEZONE", "UTC")
     ocr_primary_lang = environ.get("OCR_PRIMARY_LANG", "rus+eng")
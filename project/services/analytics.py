@@ -3,13 +3,21 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass
-from statistics import mean
-from typing import Dict, List
+from typing import Any, Dict, List
 
+import numpy as np
+
+from .cache import MISSING, WriteThroughCache
 from .categories import CategoryNormalizer
 from .db import AsyncDatabase
 
 
+# Lower bounds (in percent) of each rate bucket, paired with its label.
+_BUCKET_THRESHOLDS = (1, 5, 10)
+_BUCKET_LABELS = ("0%", "1-4%", "5-9%", "10-100%")
+_INSIGHTS_CACHE_SIZE = 256
+
+
 @dataclass(frozen=True)
 class CategoryInsight:
     bank_name: str
@@ -43,72 +51,82 @@ class AnalyticsService:
     def __init__(self, db: AsyncDatabase, normalizer: CategoryNormalizer) -> None:
         self._db = db
         self._normalizer = normalizer
+        # Panels of one dashboard share a fetch until the bank data changes.
+        # Entries are (rates_version, insights) for the most recently seen users.
+        self._insights_cache = WriteThroughCache(_INSIGHTS_CACHE_SIZE)
+
+    def _insight_from_row(self, row: Any) -> CategoryInsight:
+        return CategoryInsight(
+            bank_name=row["bank_name"],
+            category=row["name"],
+            normalized_category=row["canonical_name"],
+            rate=row["cashback_rate"],
+            level=row["level"],
+        )
 
     async def _collect_insights(self, user_id: int) -> List[CategoryInsight]:
+        version = self._db.rates_version(user_id)
+        cached = self._insights_cache.lookup(user_id)
+        if cached is not MISSING and cached[0] == version:
+            return cached[1]
+        generation = self._insights_cache.generation
         rows = await self._db.fetch_all_category_rates(user_id)
-        insights: List[CategoryInsight] = []
-        for row in rows:
-            normalized = self._normalizer.normalize(row["normalized_name"])
-            insights.append(
-                CategoryInsight(
-                    bank_name=row["bank_name"],
-                    category=row["name"],
-                    normalized_category=normalized,
-                    rate=float(row["cashback_rate"]),
-                    level=int(row["level"]),
-                )
-            )
+        insights = [self._insight_from_row(row) for row in rows]
+        self._insights_cache.store(user_id, (version, insights), generation)
         return insights
 
     async def top_worst_categories(self, user_id: int, limit: int = 5) -> List[CategoryInsight]:
         if limit <= 0:
             return []
         insights = await self._collect_insights(user_id)
-        insights.sort(key=lambda insight: insight.rate)
-        return insights[:limit]
+        if not insights:
+            return []
+        # Select the lowest rates on a flat array; ties keep the query order.
+        rates = np.fromiter(
+            (insight.rate for insight in insights), dtype=np.float64, count=len(insights)
+        )
+        if limit < len(insights):
+            indices = np.argpartition(rates, limit - 1)[:limit]
+        else:
+            indices = np.arange(len(insights))
+        indices = indices[np.lexsort((indices, rates[indices]))]
+        return [insights[index] for index in indices.tolist()]
 
     async def top_by_buckets(self, user_id: int) -> Dict[str, List[CategoryInsight]]:
         insights = await self._collect_insights(user_id)
-        buckets: Dict[str, List[CategoryInsight]] = defaultdict(list)
-        for insight in insights:
-            rate_percent = insight.rate * 100
-            if rate_percent >= 10:
-                bucket = "10-100%"
-            elif rate_percent >= 5:
-                bucket = "5-9%"
-            elif rate_percent >= 1:
-                bucket = "1-4%"
-            else:
-                bucket = "0%"
-            buckets[bucket].append(insight)
-        for key in buckets:
-            buckets[key].sort(key=lambda insight: insight.rate, reverse=True)
+        if not insights:
+            return {}
+        percents = np.fromiter(
+            (insight.rate for insight in insights), dtype=np.float64, count=len(insights)
+        ) * 100
+        bucket_indices = sum(
+            (percents >= threshold).view(np.int8) for threshold in _BUCKET_THRESHOLDS
+        )
+        counts = np.bincount(bucket_indices, minlength=len(_BUCKET_LABELS)).tolist()
+        # Rows arrive ordered by rate descending, so each bucket is one contiguous run,
+        # starting from the highest bucket.
+        buckets: Dict[str, List[CategoryInsight]] = {}
+        start = 0
+        for index in reversed(range(len(_BUCKET_LABELS))):
+            count = counts[index]
+            if count:
+                buckets[_BUCKET_LABELS[index]] = insights[start : start + count]
+                start += count
         return buckets
 
     async def bank_strength_score(self, user_id: int) -> List[BankStrength]:
-        insights = await self._collect_insights(user_id)
-        top_threshold = 0.05
-        weak_threshold = 0.01
-        per_bank_top: Dict[str, int] = defaultdict(int)
-        per_bank_weak: Dict[str, int] = defaultdict(int)
-        for insight in insights:
-            if insight.rate >= top_threshold:
-                per_bank_top[insight.bank_name] += 1
-            if insight.rate < weak_threshold:
-                per_bank_weak[insight.bank_name] += 1
-        strengths: List[BankStrength] = []
-        for bank_name in {insight.bank_name for insight in insights}:
-            top_count = per_bank_top.get(bank_name, 0)
-            weak_count = per_bank_weak.get(bank_name, 0)
-            score = top_count * 2 - weak_count
-            strengths.append(
-                BankStrength(
-                    bank_name=bank_name,
-                    score=score,
-                    top_categories=top_count,
-                    weak_categories=weak_count,
-                )
+        counts = await self._db.fetch_bank_strength_counts(
+            user_id, top_threshold=0.05, weak_threshold=0.01
+        )
+        strengths = [
+            BankStrength(
+                bank_name=bank_name,
+                score=top_count * 2 - weak_count,
+                top_categories=top_count,
+                weak_categories=weak_count,
             )
+            for bank_name, top_count, weak_count in counts
+        ]
         strengths.sort(key=lambda strength: strength.score, reverse=True)
         return strengths
 
@@ -127,8 +145,9 @@ class AnalyticsService:
 
         coverage: List[CategoryCoverage] = []
         for normalized_category, items in grouped.items():
-            best = max(items, key=lambda insight: insight.rate)
-            average_rate = mean(insight.rate for insight in items)
+            # Insights keep the rate-descending query order, so the first item is the best.
+            best = items[0]
+            average_rate = sum(insight.rate for insight in items) / len(items)
             bank_count = len({insight.bank_name for insight in items})
             coverage.append(
                 CategoryCoverage(
@@ -141,6 +160,6 @@ class AnalyticsService:
                 )
             )
 
-        coverage.sort(key=lambda item: item.best_rate, reverse=True)
+        # Groups were opened in best-rate order, so coverage is already sorted.
         return coverage[:limit]
 
@@ -0,0 +1,43 @@
+"""Small in-process caches shared by the services."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any
+
+MISSING = object()
+
+
+class WriteThroughCache:
+    """Small per-user LRU kept in step with writes.
+
+    ``generation`` moves on every write so a read that raced a write does not
+    store the value it fetched before the write committed.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._entries: OrderedDict[int, Any] = OrderedDict()
+        self._maxsize = maxsize
+        self.generation = 0
+
+    def lookup(self, key: int) -> Any:
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            return MISSING
+        return self._entries[key]
+
+    def store(self, key: int, value: Any, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def write(self, key: int, value: Any) -> None:
+        self.generation += 1
+        self.store(key, value, self.generation)
+
+    def evict(self, key: int) -> None:
+        self.generation += 1
+        self._entries.pop(key, None)
@@ -2,56 +2,78 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Mapping
 
 LOGGER = logging.getLogger(__name__)
 
+_CANONICAL_CATEGORIES: Mapping[str, str] = MappingProxyType(
+    {
+        "groceries": "groceries",
+        "food": "groceries",
+        "supermarket": "groceries",
+        "supermarkets": "groceries",
+        "супермаркет": "groceries",
+        "магазин": "groceries",
+        "аптека": "pharmacy",
+        "pharmacy": "pharmacy",
+        "drugstore": "pharmacy",
+        "restaurant": "dining",
+        "dining": "dining",
+        "кафе": "dining",
+        "рестораны": "dining",
+        "travel": "travel",
+        "flight": "travel",
+        "hotel": "travel",
+        "отели": "travel",
+        "путешествия": "travel",
+        "gas": "transport",
+        "taxi": "transport",
+        "uber": "transport",
+        "fuel": "transport",
+        "азс": "transport",
+        "electronics": "electronics",
+        "tech": "electronics",
+        "интернет": "online",
+        "online": "online",
+        "digital": "online",
+        "entertainment": "entertainment",
+        "развлечения": "entertainment",
+        "education": "education",
+        "образование": "education",
+    }
+)
+
 
 class CategoryNormalizer:
     """Normalize categories into unified forms."""
 
+    normalize: Callable[[str], str]
+
     def __init__(self) -> None:
-        self._mapping: Dict[str, str] = {
-            "groceries": "groceries",
-            "food": "groceries",
-            "supermarket": "groceries",
-            "supermarkets": "groceries",
-            "супермаркет": "groceries",
-            "магазин": "groceries",
-            "аптека": "pharmacy",
-            "pharmacy": "pharmacy",
-            "drugstore": "pharmacy",
-            "restaurant": "dining",
-            "dining": "dining",
-            "кафе": "dining",
-            "рестораны": "dining",
-            "travel": "travel",
-            "flight": "travel",
-            "hotel": "travel",
-            "отели": "travel",
-            "путешествия": "travel",
-            "gas": "transport",
-            "taxi": "transport",
-            "uber": "transport",
-            "fuel": "transport",
-            "азс": "transport",
-            "electronics": "electronics",
-            "tech": "electronics",
-            "интернет": "online",
-            "online": "online",
-            "digital": "online",
-            "entertainment": "entertainment",
-            "развлечения": "entertainment",
-            "education": "education",
-            "образование": "education",
-        }
-
-    def normalize(self, category: str) -> str:
+        self._mapping = _CANONICAL_CATEGORIES
+        # Category names come from a small, repeated vocabulary; memoize per instance.
+        self.normalize = lru_cache(maxsize=1024)(self._normalize)
+
+    @property
+    def aliases(self) -> Mapping[str, str]:
+        return self._mapping
+
+    def _normalize(self, category: str) -> str:
         key = category.strip().lower()
         normalized = self._mapping.get(key, key)
-        LOGGER.debug("Normalized category '%s' -> '%s'", category, normalized)
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("Normalized category '%s' -> '%s'", category, normalized)
         return normalized
 
     def decompose(self, category: str) -> list[str]:
-        parts = [part.strip() for part in category.split("/") if part.strip()]
-        return [self.normalize(part) for part in parts] or [self.normalize(category)]
+        mapping = self._mapping
+        lowered = category.lower()
+        normalized = [
+            mapping.get(part, part) for raw in lowered.split("/") if (part := raw.strip())
+        ]
+        if normalized:
+            return normalized
+        key = lowered.strip()
+        return [mapping.get(key, key)]
@@ -4,16 +4,52 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from contextlib import asynccontextmanager
-from dataclasses import dataclass
-from datetime import datetime
+import sqlite3
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, AsyncIterator, Iterable, Sequence
+from typing import Any, AsyncIterator, Callable, Iterable, Mapping, Sequence
 
 import aiosqlite
 
+from .cache import MISSING, WriteThroughCache
+
 LOGGER = logging.getLogger(__name__)
 
+_READ_POOL_SIZE = 4
+_STATEMENT_CACHE_SIZE = 256
+_WRITE_BATCH_SIZE = 64
+_ACTIVITY_FLUSH_INTERVAL = 0.25
+_ACTIVITY_FLUSH_THRESHOLD = 256
+_MAINTENANCE_INTERVAL = 3600
+# Stored in PRAGMA user_version; _open_writer runs the steps a file has not seen yet.
+_SCHEMA_VERSION = 3
+_INCREMENTAL_VACUUM_PAGES = 100
+
+# One fixed statement per notification type keeps the SQL text stable for the statement cache.
+_MARK_NOTIFICATION_SENT_SQL = {
+    notification_type: f"UPDATE notification_settings SET {column} = CURRENT_TIMESTAMP WHERE user_id = ?"
+    for notification_type, column in (
+        ("monthly", "last_monthly_sent"),
+        ("warning", "last_warning_sent"),
+        ("critical", "last_critical_sent"),
+    )
+}
+
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+WriteJob = Callable[[sqlite3.Connection], Any]
+WriteOutcome = tuple[asyncio.Future[Any], Any, BaseException | None]
+
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS users (
@@ -39,6 +75,83 @@ CREATE TABLE IF NOT EXISTS receipts (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_receipts_user_created
+ON receipts(user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_receipts_user_purchase
+ON receipts(user_id, purchase_date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_receipts_user_category
+ON receipts(user_id, category);
+
+CREATE TABLE IF NOT EXISTS receipt_totals (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    total_amount REAL NOT NULL DEFAULT 0,
+    total_cashback REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, category)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_receipts_totals_insert
+AFTER INSERT ON receipts
+BEGIN
+    INSERT INTO receipt_totals (user_id, category, total_amount, total_cashback)
+    VALUES (NEW.user_id, NEW.category, NEW.amount, NEW.cashback)
+    ON CONFLICT(user_id, category) DO UPDATE SET
+        total_amount = total_amount + excluded.total_amount,
+        total_cashback = total_cashback + excluded.total_cashback;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_receipts_totals_delete
+AFTER DELETE ON receipts
+BEGIN
+    UPDATE receipt_totals
+    SET total_amount = total_amount - OLD.amount, total_cashback = total_cashback - OLD.cashback
+    WHERE user_id = OLD.user_id AND category = OLD.category;
+    DELETE FROM receipt_totals
+    WHERE user_id = OLD.user_id
+        AND category = OLD.category
+        AND NOT EXISTS (
+            SELECT 1 FROM receipts WHERE user_id = OLD.user_id AND category = OLD.category
+        );
+END;
+
+CREATE TABLE IF NOT EXISTS receipt_category_daily (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    purchase_date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total_amount REAL NOT NULL DEFAULT 0,
+    total_cashback REAL NOT NULL DEFAULT 0,
+    receipt_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, purchase_date, category)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_receipts_daily_insert
+AFTER INSERT ON receipts
+BEGIN
+    INSERT INTO receipt_category_daily (user_id, purchase_date, category, total_amount, total_cashback, receipt_count)
+    VALUES (NEW.user_id, NEW.purchase_date, NEW.category, NEW.amount, NEW.cashback, 1)
+    ON CONFLICT(user_id, purchase_date, category) DO UPDATE SET
+        total_amount = total_amount + excluded.total_amount,
+        total_cashback = total_cashback + excluded.total_cashback,
+        receipt_count = receipt_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_receipts_daily_delete
+AFTER DELETE ON receipts
+BEGIN
+    UPDATE receipt_category_daily
+    SET total_amount = total_amount - OLD.amount,
+        total_cashback = total_cashback - OLD.cashback,
+        receipt_count = receipt_count - 1
+    WHERE user_id = OLD.user_id AND purchase_date = OLD.purchase_date AND category = OLD.category;
+    DELETE FROM receipt_category_daily
+    WHERE user_id = OLD.user_id
+        AND purchase_date = OLD.purchase_date
+        AND category = OLD.category
+        AND receipt_count <= 0;
+END;
+
 CREATE TABLE IF NOT EXISTS banks (
     id INTEGER PRIMARY KEY,
     name TEXT UNIQUE NOT NULL,
@@ -55,9 +168,13 @@ CREATE TABLE IF NOT EXISTS user_banks (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_user_banks_user
+ON user_banks(user_id, custom_name);
+
 CREATE TABLE IF NOT EXISTS bank_categories (
     id INTEGER PRIMARY KEY,
     user_bank_id INTEGER NOT NULL REFERENCES user_banks(id) ON DELETE CASCADE,
+    user_id INTEGER,
     name TEXT NOT NULL,
     normalized_name TEXT NOT NULL,
     cashback_rate REAL NOT NULL,
@@ -69,6 +186,11 @@ CREATE TABLE IF NOT EXISTS bank_categories (
 CREATE UNIQUE INDEX IF NOT EXISTS idx_bank_categories_unique
 ON bank_categories(user_bank_id, normalized_name, level);
 
+CREATE TABLE IF NOT EXISTS category_aliases (
+    alias TEXT PRIMARY KEY,
+    canonical TEXT NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS templates (
     id INTEGER PRIMARY KEY,
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
@@ -79,6 +201,9 @@ CREATE TABLE IF NOT EXISTS templates (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_templates_user_created
+ON templates(user_id, created_at DESC);
+
 CREATE TABLE IF NOT EXISTS activity_log (
     id INTEGER PRIMARY KEY,
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
@@ -87,6 +212,9 @@ CREATE TABLE IF NOT EXISTS activity_log (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_activity_user_created
+ON activity_log(user_id, created_at DESC, id DESC);
+
 CREATE TABLE IF NOT EXISTS notification_settings (
     user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
     monthly_enabled INTEGER NOT NULL DEFAULT 1,
@@ -107,7 +235,7 @@ CREATE TABLE IF NOT EXISTS wizard_sessions (
 """
 
 
-@dataclass
+@dataclass(slots=True)
 class Receipt:
     user_id: int
     merchant: str
@@ -118,7 +246,37 @@ class Receipt:
     purchase_date: str
 
 
-@dataclass
+_RECEIPT_COLUMNS = "user_id, merchant, category, amount, cashback, currency, purchase_date"
+_FETCH_CHUNK_SIZE = 512
+
+
+_decode_json = json.JSONDecoder().decode
+# json.dumps builds a fresh encoder whenever options are passed; share one compact instance.
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_EMPTY_JSON_OBJECT = "{}"
+
+
+def _decode_json_object(raw: str | None) -> dict[str, Any]:
+    # Most metadata columns hold the empty default; skip the decoder for those.
+    if not raw or raw == _EMPTY_JSON_OBJECT:
+        return {}
+    return _decode_json(raw)
+
+
+async def _fetch_dicts(cursor: aiosqlite.Cursor) -> list[dict[str, Any]]:
+    # Plain tuples zipped with the column names once are cheaper than dict(Row) per row.
+    cursor.row_factory = None
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in await cursor.fetchall()]
+
+
+async def _iter_receipts(cursor: aiosqlite.Cursor) -> AsyncIterator[Receipt]:
+    while rows := await cursor.fetchmany(_FETCH_CHUNK_SIZE):
+        for row in rows:
+            yield Receipt(*row)
+
+
+@dataclass(slots=True)
 class UserBank:
     id: int
     user_id: int
@@ -126,7 +284,7 @@ class UserBank:
     bank_id: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class BankCategoryRate:
     id: int
     user_bank_id: int
@@ -136,7 +294,7 @@ class BankCategoryRate:
     level: int
 
 
-@dataclass
+@dataclass(slots=True)
 class TemplateRecord:
     id: int
     user_id: int
@@ -145,7 +303,7 @@ class TemplateRecord:
     payload: str
 
 
-@dataclass
+@dataclass(slots=True)
 class NotificationSettings:
     user_id: int
     monthly_enabled: bool
@@ -156,117 +314,391 @@ class NotificationSettings:
     last_critical_sent: str | None
 
 
-@dataclass
+@dataclass(slots=True)
 class WizardSession:
     user_id: int
     state: str
     payload: dict[str, Any]
 
 
+_USER_CACHE_SIZE = 1024
+
 _LEVEL_THRESHOLDS: Sequence[tuple[str, int]] = (
     ("Bronze", 0),
     ("Silver", 10),
     ("Gold", 30),
     ("Diamond", 60),
 )
+_LEVEL_NAMES = tuple(name for name, _ in _LEVEL_THRESHOLDS)
+_LEVEL_POINTS = tuple(threshold for _, threshold in _LEVEL_THRESHOLDS)
 
 
 class AsyncDatabase:
     """Async wrapper around SQLite with extended domain entities."""
 
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, activity_retention: int | None = None) -> None:
         self._path = path
-        self._lock = asyncio.Lock()
+        # Newest activity entries kept per user by maintenance(); None keeps everything.
+        self._activity_retention = activity_retention
+        # Writes are applied by one task that commits them in batches; WAL lets the
+        # readers proceed alongside it. The writer is a plain sqlite3 connection owned
+        # by a dedicated thread, so a whole batch costs one hop instead of one per statement.
+        self._writer: sqlite3.Connection | None = None
+        self._write_executor: ThreadPoolExecutor | None = None
+        self._write_queue: asyncio.Queue[tuple[WriteJob, asyncio.Future[Any]] | None] = asyncio.Queue()
+        self._writer_task: asyncio.Task[None] | None = None
+        # Activity telemetry is buffered and written in one job per flush.
+        self._pending_activity: list[tuple[int, str, str]] = []
+        self._pending_last_activity: set[int] = set()
+        self._pending_bank_update: set[int] = set()
+        self._activity_flush_requested = asyncio.Event()
+        # Held from the buffer swap until the flush job commits, so a flush-before-read
+        # that finds the buffers empty still waits for entries already on their way.
+        self._activity_lock = asyncio.Lock()
+        self._activity_task: asyncio.Task[None] | None = None
+        self._maintenance_task: asyncio.Task[None] | None = None
+        # Read on nearly every message and rarely written; wizard entries hold the raw
+        # (state, payload_json) so each hit still hands out a fresh payload dict.
+        self._wizard_cache = WriteThroughCache(_USER_CACHE_SIZE)
+        self._notification_cache = WriteThroughCache(_USER_CACHE_SIZE)
+        self._readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._reader_count = 0
+        # Stamps from one counter for writes that can change fetch_all_category_rates
+        # output: per user for bank data, globally for the alias table.
+        self._rates_counter = 0
+        self._global_rates_version = 0
+        self._user_rates_versions: dict[int, int] = {}
+
+    def rates_version(self, user_id: int) -> int:
+        return max(self._user_rates_versions.get(user_id, 0), self._global_rates_version)
+
+    def _bump_rates_version(self, user_id: int | None) -> None:
+        self._rates_counter += 1
+        if user_id is None:
+            self._global_rates_version = self._rates_counter
+        else:
+            self._user_rates_versions[user_id] = self._rates_counter
 
     async def init(self) -> None:
         LOGGER.info("Initializing database at %s", self._path)
-        async with self._connect() as conn:
-            await conn.executescript(SCHEMA)
-            await conn.commit()
+        if self._writer is None:
+            self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+            self._writer = await asyncio.get_running_loop().run_in_executor(
+                self._write_executor, self._open_writer
+            )
+            self._writer_task = asyncio.create_task(self._writer_loop(self._writer))
+            self._activity_task = asyncio.create_task(self._activity_flush_loop())
+            self._maintenance_task = asyncio.create_task(self._maintenance_loop())
+        while self._reader_count < _READ_POOL_SIZE:
+            reader = await self._open()
+            await reader.execute("PRAGMA query_only=ON")
+            self._readers.put_nowait(reader)
+            self._reader_count += 1
+
+    async def close(self) -> None:
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._maintenance_task
+            self._maintenance_task = None
+        if self._activity_task is not None:
+            self._activity_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._activity_task
+            self._activity_task = None
+            await self._flush_activity()
+        if self._writer_task is not None:
+            # Let queued writes commit before shutting the writer down.
+            self._write_queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+        while self._reader_count:
+            reader = await self._readers.get()
+            await reader.close()
+            self._reader_count -= 1
+        if self._writer is not None:
+            await asyncio.get_running_loop().run_in_executor(self._write_executor, self._writer.close)
+            self._writer = None
+        if self._write_executor is not None:
+            self._write_executor.shutdown()
+            self._write_executor = None
+
+    def _open_writer(self) -> sqlite3.Connection:
+        # Autocommit mode: sqlite3 never opens implicit transactions, every
+        # write transaction is started explicitly by _apply_batch.
+        conn = sqlite3.connect(
+            self._path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=_STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        # auto_vacuum only takes effect when set before the first table is created.
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute("PRAGMA foreign_keys=ON")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # SCHEMA recreates it with the body that also prunes emptied totals.
+            conn.execute("DROP TRIGGER IF EXISTS trg_receipts_totals_delete")
+        if version < 2:
+            # Rebuilt by SCHEMA with the id tiebreaker for same-second receipts.
+            conn.execute("DROP INDEX IF EXISTS idx_receipts_user_created")
+        if version < 3:
+            # Same tiebreaker for activity entries that share one flush's timestamp.
+            conn.execute("DROP INDEX IF EXISTS idx_activity_user_created")
+        conn.executescript(SCHEMA)
+        conn.execute("BEGIN IMMEDIATE")
+        # Older files predate the user_id copy on bank_categories that lets
+        # rate lookups stay on a single-table index range.
+        cursor = conn.execute("PRAGMA table_info(bank_categories)")
+        if "user_id" not in {row["name"] for row in cursor.fetchall()}:
+            conn.execute("ALTER TABLE bank_categories ADD COLUMN user_id INTEGER")
+            conn.execute(
+                """
+                UPDATE bank_categories
+                SET user_id = (SELECT user_id FROM user_banks WHERE id = bank_categories.user_bank_id)
+                """
+            )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_bank_categories_user_rate
+            ON bank_categories(user_id, cashback_rate DESC)
+            """
+        )
+        if version < 1:
+            # Backfill the rollups once; the receipts triggers keep them current
+            # from then on. Totals left at zero by the old delete trigger go too.
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO receipt_totals (user_id, category, total_amount, total_cashback)
+                SELECT user_id, category, SUM(amount), SUM(cashback)
+                FROM receipts
+                GROUP BY user_id, category
+                """
+            )
+            conn.execute(
+                """
+                DELETE FROM receipt_totals
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM receipts
+                    WHERE receipts.user_id = receipt_totals.user_id
+                        AND receipts.category = receipt_totals.category
+                )
+                """
+            )
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO receipt_category_daily
+                    (user_id, purchase_date, category, total_amount, total_cashback, receipt_count)
+                SELECT user_id, purchase_date, category, SUM(amount), SUM(cashback), COUNT(*)
+                FROM receipts
+                GROUP BY user_id, purchase_date, category
+                """
+            )
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.commit()
+        # Bounded sampling keeps startup ANALYZE cheap on large databases.
+        conn.execute("PRAGMA analysis_limit=400")
+        conn.execute("ANALYZE")
+        return conn
+
+    async def maintenance(self) -> None:
+        """Trim old activity, release free pages, truncate the WAL and refresh statistics."""
+
+        if self._writer is None:
+            raise RuntimeError("Database is not initialized")
+        # Buffered entries must reach the table before the retention trim sees it.
+        await self._flush_activity()
+        # The writer thread runs one thing at a time, so this never overlaps a batch.
+        await asyncio.get_running_loop().run_in_executor(
+            self._write_executor, self._run_maintenance, self._writer
+        )
+
+    def _run_maintenance(self, conn: sqlite3.Connection) -> None:
+        if self._activity_retention is not None:
+            cursor = conn.execute(
+                """
+                DELETE FROM activity_log
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY user_id ORDER BY created_at DESC, id DESC
+                        ) AS position
+                        FROM activity_log
+                    )
+                    WHERE position > ?
+                )
+                """,
+                (self._activity_retention,),
+            )
+            LOGGER.debug("Trimmed %d activity entries", cursor.rowcount)
+        conn.execute(f"PRAGMA incremental_vacuum({_INCREMENTAL_VACUUM_PAGES})").fetchall()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        conn.execute("ANALYZE")
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_MAINTENANCE_INTERVAL)
+            try:
+                await self.maintenance()
+            except Exception:
+                LOGGER.exception("Database maintenance failed")
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(
+            self._path, isolation_level=None, cached_statements=_STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = aiosqlite.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            await conn.execute(pragma)
+        return conn
 
     @asynccontextmanager
-    async def _connect(self) -> AsyncIterator[aiosqlite.Connection]:
-        async with aiosqlite.connect(self._path) as conn:
-            conn.row_factory = aiosqlite.Row
+    async def _read(self) -> AsyncIterator[aiosqlite.Connection]:
+        if not self._reader_count:
+            raise RuntimeError("Database is not initialized")
+        conn = await self._readers.get()
+        try:
             yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def _submit(self, job: WriteJob) -> Any:
+        if self._writer_task is None:
+            raise RuntimeError("Database is not initialized")
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((job, future))
+        return await future
+
+    async def _writer_loop(self, conn: sqlite3.Connection) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._write_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < _WRITE_BATCH_SIZE and not self._write_queue.empty():
+                item = self._write_queue.get_nowait()
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            outcomes = await loop.run_in_executor(self._write_executor, self._apply_batch, conn, batch)
+            self._resolve(outcomes)
+            if stop:
+                return
+
+    def _apply_batch(
+        self, conn: sqlite3.Connection, batch: list[tuple[WriteJob, asyncio.Future[Any]]]
+    ) -> list[WriteOutcome]:
+        """Run queued jobs in one transaction, isolating each behind a savepoint."""
+
+        outcomes: list[WriteOutcome] = []
+        if len(batch) == 1:
+            # A lone job owns the whole transaction, so no savepoint is needed.
+            job, future = batch[0]
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = job(conn)
+                conn.commit()
+            except Exception as exc:
+                conn.rollback()
+                outcomes.append((future, None, exc))
+            else:
+                outcomes.append((future, result, None))
+            return outcomes
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job, future in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = job(conn)
+                except Exception as exc:
+                    conn.execute("ROLLBACK TO job")
+                    outcomes.append((future, None, exc))
+                else:
+                    outcomes.append((future, result, None))
+                conn.execute("RELEASE job")
+            conn.commit()
+        except Exception as exc:
+            LOGGER.exception("Write batch of %d jobs failed", len(batch))
+            conn.rollback()
+            outcomes = [(future, None, exc) for _, future in batch]
+        return outcomes
+
+    @staticmethod
+    def _resolve(outcomes: list[WriteOutcome]) -> None:
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
 
     async def upsert_user(self, telegram_id: int, language: str) -> int:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Upserting user %s", telegram_id)
-                await conn.execute(
-                    """
-                    INSERT INTO users (telegram_id, language)
-                    VALUES (?, ?)
-                    ON CONFLICT(telegram_id) DO UPDATE SET language=excluded.language
-                    """,
-                    (telegram_id, language),
-                )
-                await conn.commit()
-                cursor = await conn.execute(
-                    "SELECT id FROM users WHERE telegram_id = ?",
-                    (telegram_id,),
-                )
-                row = await cursor.fetchone()
-                if row is None:
-                    raise RuntimeError("Failed to retrieve user id after upsert")
-                return int(row["id"])
+        def job(conn: sqlite3.Connection) -> int:
+            LOGGER.debug("Upserting user %s", telegram_id)
+            cursor = conn.execute(
+                """
+                INSERT INTO users (telegram_id, language)
+                VALUES (?, ?)
+                ON CONFLICT(telegram_id) DO UPDATE SET language=excluded.language
+                RETURNING id
+                """,
+                (telegram_id, language),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise RuntimeError("Failed to retrieve user id after upsert")
+            return int(row["id"])
+
+        return await self._submit(job)
 
     async def update_last_activity(self, user_id: int, *, bank_update: bool = False) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                now = datetime.utcnow().isoformat()
-                if bank_update:
-                    LOGGER.debug("Updating bank activity timestamp for user %s", user_id)
-                    await conn.execute(
-                        "UPDATE users SET last_activity = ?, last_bank_update = ? WHERE id = ?",
-                        (now, now, user_id),
-                    )
-                else:
-                    LOGGER.debug("Updating activity timestamp for user %s", user_id)
-                    await conn.execute(
-                        "UPDATE users SET last_activity = ? WHERE id = ?",
-                        (now, user_id),
-                    )
-                await conn.commit()
+        if bank_update:
+            self._pending_bank_update.add(user_id)
+        else:
+            self._pending_last_activity.add(user_id)
 
     async def increment_points(self, user_id: int, points: int) -> tuple[int, str]:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Incrementing points for user %s by %s", user_id, points)
-                await conn.execute(
-                    "UPDATE users SET points = points + ?, last_activity = CURRENT_TIMESTAMP WHERE id = ?",
-                    (points, user_id),
-                )
-                await conn.commit()
-                cursor = await conn.execute(
-                    "SELECT points FROM users WHERE id = ?",
-                    (user_id,),
-                )
-                row = await cursor.fetchone()
-                if row is None:
-                    raise RuntimeError("User not found when incrementing points")
-                total_points = int(row["points"])
-                level = self._calculate_level(total_points)
-                await conn.execute(
-                    "UPDATE users SET level = ? WHERE id = ?",
-                    (level, user_id),
-                )
-                await conn.commit()
-                return total_points, level
+        def job(conn: sqlite3.Connection) -> tuple[int, str]:
+            LOGGER.debug("Incrementing points for user %s by %s", user_id, points)
+            cursor = conn.execute(
+                """
+                UPDATE users SET points = points + ?, last_activity = CURRENT_TIMESTAMP
+                WHERE id = ?
+                RETURNING points
+                """,
+                (points, user_id),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise RuntimeError("User not found when incrementing points")
+            total_points = int(row["points"])
+            level = self._calculate_level(total_points)
+            conn.execute(
+                "UPDATE users SET level = ? WHERE id = ?",
+                (level, user_id),
+            )
+            return total_points, level
+
+        return await self._submit(job)
 
     @staticmethod
     def _calculate_level(points: int) -> str:
-        level = "Bronze"
-        for name, threshold in _LEVEL_THRESHOLDS:
-            if points >= threshold:
-                level = name
-            else:
-                break
-        return level
+        # Points below the first threshold still rank at the first level.
+        return _LEVEL_NAMES[max(bisect_right(_LEVEL_POINTS, points) - 1, 0)]
 
     async def fetch_user_profile(self, user_id: int) -> dict[str, Any] | None:
-        async with self._connect() as conn:
+        await self._flush_activity()
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
                 SELECT telegram_id, language, points, level, last_activity, last_bank_update
@@ -278,29 +710,37 @@ class AsyncDatabase:
             return dict(row) if row else None
 
     async def delete_last_receipt(self, user_id: int) -> bool:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Deleting last receipt for user %s", user_id)
-                cursor = await conn.execute(
-                    "SELECT id FROM receipts WHERE user_id = ? ORDER BY created_at DESC LIMIT 1",
-                    (user_id,),
+        def job(conn: sqlite3.Connection) -> bool:
+            LOGGER.debug("Deleting last receipt for user %s", user_id)
+            cursor = conn.execute(
+                """
+                DELETE FROM receipts
+                WHERE id = (
+                    SELECT id FROM receipts WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 1
                 )
-                row = await cursor.fetchone()
-                if row is None:
-                    return False
-                await conn.execute("DELETE FROM receipts WHERE id = ?", (row["id"],))
-                await conn.commit()
-                return True
+                RETURNING id
+                """,
+                (user_id,),
+            )
+            return cursor.fetchone() is not None
+
+        return await self._submit(job)
 
     async def add_receipt(self, receipt: Receipt) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Adding receipt for user %s", receipt.user_id)
-                await conn.execute(
-                    """
-                    INSERT INTO receipts (user_id, merchant, category, amount, cashback, currency, purchase_date)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
+        await self.add_receipts([receipt])
+
+    async def add_receipts(self, receipts: Sequence[Receipt]) -> None:
+        if not receipts:
+            return
+
+        def job(conn: sqlite3.Connection) -> None:
+            LOGGER.debug("Adding %d receipts", len(receipts))
+            conn.executemany(
+                """
+                INSERT INTO receipts (user_id, merchant, category, amount, cashback, currency, purchase_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
                     (
                         receipt.user_id,
                         receipt.merchant,
@@ -309,32 +749,56 @@ class AsyncDatabase:
                         receipt.cashback,
                         receipt.currency,
                         receipt.purchase_date,
-                    ),
-                )
-                await conn.commit()
+                    )
+                    for receipt in receipts
+                ],
+            )
 
-    async def list_receipts(self, user_id: int, limit: int = 50) -> list[dict[str, Any]]:
-        async with self._connect() as conn:
+        await self._submit(job)
+
+    async def list_receipts(self, user_id: int, limit: int = 50) -> AsyncIterator[Receipt]:
+        async with self._read() as conn:
             cursor = await conn.execute(
-                "SELECT * FROM receipts WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                f"""
+                SELECT {_RECEIPT_COLUMNS}
+                FROM receipts
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+                """,
                 (user_id, limit),
             )
+            async for receipt in _iter_receipts(cursor):
+                yield receipt
+
+    async def fetch_category_totals(self, user_id: int) -> dict[str, tuple[float, float]]:
+        """Return all-time ``(amount, cashback)`` per category, maintained on write."""
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                "SELECT category, total_amount, total_cashback FROM receipt_totals WHERE user_id = ?",
+                (user_id,),
+            )
             rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return {
+                row["category"]: (float(row["total_amount"]), float(row["total_cashback"]))
+                for row in rows
+            }
 
     async def iter_category_totals(
         self, user_id: int, days: int
     ) -> AsyncIterator[tuple[str, float, float]]:
-        async with self._connect() as conn:
+        # Same UTC day boundary as date('now', '-N day'), bound as a plain value.
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
-                SELECT category, SUM(amount) AS total_amount, SUM(cashback) AS total_cashback
-                FROM receipts
-                WHERE user_id = ? AND purchase_date >= date('now', ?)
+                SELECT category, SUM(total_amount) AS total_amount, SUM(total_cashback) AS total_cashback
+                FROM receipt_category_daily
+                WHERE user_id = ? AND purchase_date >= ?
                 GROUP BY category
                 ORDER BY total_cashback DESC
                 """,
-                (user_id, f"-{days} day"),
+                (user_id, cutoff),
             )
             async for row in cursor:
                 yield (
@@ -343,11 +807,11 @@ class AsyncDatabase:
                     float(row["total_cashback"]),
                 )
 
-    async def fetch_recent_cashback(self, user_id: int, limit: int = 10) -> list[dict[str, Any]]:
-        async with self._connect() as conn:
+    async def fetch_recent_cashback(self, user_id: int, limit: int = 10) -> AsyncIterator[Receipt]:
+        async with self._read() as conn:
             cursor = await conn.execute(
-                """
-                SELECT merchant, category, amount, cashback, currency, purchase_date
+                f"""
+                SELECT {_RECEIPT_COLUMNS}
                 FROM receipts
                 WHERE user_id = ?
                 ORDER BY purchase_date DESC
@@ -355,100 +819,145 @@ class AsyncDatabase:
                 """,
                 (user_id, limit),
             )
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            async for receipt in _iter_receipts(cursor):
+                yield receipt
 
     async def list_users(self) -> list[dict[str, Any]]:
-        async with self._connect() as conn:
+        await self._flush_activity()
+        async with self._read() as conn:
             cursor = await conn.execute(
                 "SELECT id, telegram_id, language, last_activity, last_bank_update FROM users"
             )
-            rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return await _fetch_dicts(cursor)
 
     async def purge_user(self, user_id: int) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.info("Purging data for user %s", user_id)
-                await conn.execute("DELETE FROM receipts WHERE user_id = ?", (user_id,))
-                await conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
-                await conn.commit()
+        await self._flush_activity()
+
+        def job(conn: sqlite3.Connection) -> None:
+            LOGGER.info("Purging data for user %s", user_id)
+            conn.execute("DELETE FROM receipts WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM receipt_totals WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM receipt_category_daily WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+
+        try:
+            await self._submit(job)
+        finally:
+            self._wizard_cache.evict(user_id)
+            self._notification_cache.evict(user_id)
+        self._bump_rates_version(user_id)
 
     # --- Banks and categories -------------------------------------------------
 
     async def list_banks(self) -> list[dict[str, Any]]:
-        async with self._connect() as conn:
+        async with self._read() as conn:
             cursor = await conn.execute("SELECT id, name, locale_names FROM banks ORDER BY name")
             rows = await cursor.fetchall()
-            result: list[dict[str, Any]] = []
-            for row in rows:
-                locale_names = json.loads(row["locale_names"] or "{}")
-                result.append({"id": row["id"], "name": row["name"], "locale_names": locale_names})
-            return result
+            return [
+                {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "locale_names": _decode_json_object(row["locale_names"]),
+                }
+                for row in rows
+            ]
 
     async def ensure_bank(self, name: str, locale_names: dict[str, str] | None = None) -> int:
-        async with self._lock:
-            async with self._connect() as conn:
-                locale_json = json.dumps(locale_names or {})
-                await conn.execute(
-                    """
-                    INSERT INTO banks (name, locale_names)
-                    VALUES (?, ?)
-                    ON CONFLICT(name) DO UPDATE SET locale_names=excluded.locale_names
-                    """,
-                    (name, locale_json),
-                )
-                await conn.commit()
-                cursor = await conn.execute(
-                    "SELECT id FROM banks WHERE name = ?",
-                    (name,),
-                )
-                row = await cursor.fetchone()
-                if row is None:
-                    raise RuntimeError("Failed to ensure bank entry")
-                return int(row["id"])
+        def job(conn: sqlite3.Connection) -> int:
+            locale_json = _encode_json(locale_names or {})
+            conn.execute(
+                """
+                INSERT INTO banks (name, locale_names)
+                VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET locale_names=excluded.locale_names
+                """,
+                (name, locale_json),
+            )
+            cursor = conn.execute(
+                "SELECT id FROM banks WHERE name = ?",
+                (name,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise RuntimeError("Failed to ensure bank entry")
+            return int(row["id"])
+
+        return await self._submit(job)
 
     async def create_user_bank(
-        self, user_id: int, custom_name: str, bank_id: int | None = None
+        self,
+        user_id: int,
+        custom_name: str,
+        bank_id: int | None = None,
+        categories: Iterable[tuple[str, str, float, int]] = (),
     ) -> int:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Creating bank '%s' for user %s", custom_name, user_id)
-                cursor = await conn.execute(
-                    """
-                    INSERT INTO user_banks (user_id, bank_id, custom_name)
-                    VALUES (?, ?, ?)
-                    """,
-                    (user_id, bank_id, custom_name),
-                )
-                await conn.commit()
-                user_bank_id = cursor.lastrowid
-                await conn.execute(
-                    "UPDATE users SET last_bank_update = CURRENT_TIMESTAMP WHERE id = ?",
-                    (user_id,),
-                )
-                await conn.commit()
-                return int(user_bank_id)
+        """Insert a user bank, optionally with its categories in the same transaction."""
+
+        def job(conn: sqlite3.Connection) -> int:
+            LOGGER.debug("Creating bank '%s' for user %s", custom_name, user_id)
+            cursor = conn.execute(
+                """
+                INSERT INTO user_banks (user_id, bank_id, custom_name)
+                VALUES (?, ?, ?)
+                """,
+                (user_id, bank_id, custom_name),
+            )
+            user_bank_id = cursor.lastrowid
+            # Lines that normalize to the same category resolve last-wins, as in
+            # replace_bank_categories, instead of failing the whole bank.
+            conn.executemany(
+                """
+                INSERT INTO bank_categories (user_bank_id, user_id, name, normalized_name, cashback_rate, level)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_bank_id, normalized_name, level) DO UPDATE SET
+                    name = excluded.name,
+                    cashback_rate = excluded.cashback_rate
+                """,
+                [
+                    (user_bank_id, user_id, name, normalized, rate, level)
+                    for name, normalized, rate, level in categories
+                ],
+            )
+            conn.execute(
+                "UPDATE users SET last_bank_update = CURRENT_TIMESTAMP WHERE id = ?",
+                (user_id,),
+            )
+            return int(user_bank_id)
+
+        result = await self._submit(job)
+        self._bump_rates_version(user_id)
+        return result
 
     async def update_user_bank_name(self, user_bank_id: int, custom_name: str) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Renaming user bank %s -> %s", user_bank_id, custom_name)
-                await conn.execute(
-                    "UPDATE user_banks SET custom_name = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (custom_name, user_bank_id),
-                )
-                await conn.commit()
+        def job(conn: sqlite3.Connection) -> int | None:
+            LOGGER.debug("Renaming user bank %s -> %s", user_bank_id, custom_name)
+            row = conn.execute(
+                """
+                UPDATE user_banks SET custom_name = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+                RETURNING user_id
+                """,
+                (custom_name, user_bank_id),
+            ).fetchone()
+            return int(row["user_id"]) if row is not None else None
+
+        user_id = await self._submit(job)
+        if user_id is not None:
+            self._bump_rates_version(user_id)
 
     async def delete_user_bank(self, user_bank_id: int) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.info("Deleting user bank %s", user_bank_id)
-                await conn.execute("DELETE FROM user_banks WHERE id = ?", (user_bank_id,))
-                await conn.commit()
+        def job(conn: sqlite3.Connection) -> int | None:
+            LOGGER.info("Deleting user bank %s", user_bank_id)
+            row = conn.execute(
+                "DELETE FROM user_banks WHERE id = ? RETURNING user_id", (user_bank_id,)
+            ).fetchone()
+            return int(row["user_id"]) if row is not None else None
+
+        user_id = await self._submit(job)
+        if user_id is not None:
+            self._bump_rates_version(user_id)
 
     async def list_user_banks(self, user_id: int) -> list[UserBank]:
-        async with self._connect() as conn:
+        async with self._read() as conn:
             cursor = await conn.execute(
                 "SELECT id, user_id, custom_name, bank_id FROM user_banks WHERE user_id = ? ORDER BY custom_name",
                 (user_id,),
@@ -467,31 +976,85 @@ class AsyncDatabase:
     async def replace_bank_categories(
         self, user_bank_id: int, categories: Iterable[tuple[str, str, float, int]]
     ) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.debug("Replacing categories for user bank %s", user_bank_id)
-                await conn.execute(
-                    "DELETE FROM bank_categories WHERE user_bank_id = ?",
-                    (user_bank_id,),
-                )
-                await conn.executemany(
-                    """
-                    INSERT INTO bank_categories (user_bank_id, name, normalized_name, cashback_rate, level)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    [
-                        (user_bank_id, name, normalized, rate, level)
-                        for name, normalized, rate, level in categories
-                    ],
+        rows = [
+            (user_bank_id, name, normalized, rate, level)
+            for name, normalized, rate, level in categories
+        ]
+
+        def job(conn: sqlite3.Connection) -> int | None:
+            LOGGER.debug("Replacing categories for user bank %s", user_bank_id)
+            # Stage into an unindexed temp table so the unique index is touched
+            # by one sorted INSERT ... SELECT instead of once per executemany row.
+            conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS staged_bank_categories (
+                    user_bank_id INTEGER,
+                    name TEXT,
+                    normalized_name TEXT,
+                    cashback_rate REAL,
+                    level INTEGER
                 )
-                await conn.execute(
-                    "UPDATE user_banks SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                    (user_bank_id,),
+                """
+            )
+            conn.execute("DELETE FROM staged_bank_categories")
+            conn.executemany(
+                "INSERT INTO staged_bank_categories VALUES (?, ?, ?, ?, ?)", rows
+            )
+            # Only rows that actually changed or disappeared are written.
+            conn.execute(
+                """
+                DELETE FROM bank_categories
+                WHERE user_bank_id = ? AND (normalized_name, level) NOT IN (
+                    SELECT normalized_name, level FROM staged_bank_categories
                 )
-                await conn.commit()
+                """,
+                (user_bank_id,),
+            )
+            conn.execute(
+                """
+                INSERT INTO bank_categories (user_bank_id, user_id, name, normalized_name, cashback_rate, level)
+                SELECT
+                    user_bank_id,
+                    (SELECT user_id FROM user_banks WHERE id = staged_bank_categories.user_bank_id),
+                    name,
+                    normalized_name,
+                    cashback_rate,
+                    level
+                FROM staged_bank_categories
+                ORDER BY normalized_name, level, rowid
+                ON CONFLICT(user_bank_id, normalized_name, level) DO UPDATE SET
+                    name = excluded.name,
+                    cashback_rate = excluded.cashback_rate,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE name IS NOT excluded.name OR cashback_rate IS NOT excluded.cashback_rate
+                """
+            )
+            conn.execute("DELETE FROM staged_bank_categories")
+            row = conn.execute(
+                "UPDATE user_banks SET updated_at = CURRENT_TIMESTAMP WHERE id = ? RETURNING user_id",
+                (user_bank_id,),
+            ).fetchone()
+            return int(row["user_id"]) if row is not None else None
+
+        user_id = await self._submit(job)
+        if user_id is not None:
+            self._bump_rates_version(user_id)
+
+    async def sync_category_aliases(self, aliases: Mapping[str, str]) -> None:
+        """Mirror the normalizer mapping so rate queries return canonical names."""
+
+        def job(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM category_aliases")
+            conn.executemany(
+                "INSERT INTO category_aliases (alias, canonical) VALUES (?, ?)",
+                aliases.items(),
+            )
+
+        await self._submit(job)
+        self._bump_rates_version(None)
 
     async def fetch_bank_categories(self, user_bank_id: int) -> list[BankCategoryRate]:
-        async with self._connect() as conn:
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
                 SELECT id, user_bank_id, name, normalized_name, cashback_rate, level
@@ -515,7 +1078,7 @@ class AsyncDatabase:
             ]
 
     async def fetch_all_category_rates(self, user_id: int) -> list[dict[str, Any]]:
-        async with self._connect() as conn:
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
                 SELECT
@@ -523,22 +1086,45 @@ class AsyncDatabase:
                     ub.custom_name AS bank_name,
                     bc.name,
                     bc.normalized_name,
+                    COALESCE(ca.canonical, bc.normalized_name) AS canonical_name,
                     bc.cashback_rate,
                     bc.level
                 FROM bank_categories bc
                 JOIN user_banks ub ON ub.id = bc.user_bank_id
-                WHERE ub.user_id = ?
+                LEFT JOIN category_aliases ca ON ca.alias = bc.normalized_name
+                WHERE bc.user_id = ?
                 ORDER BY bc.cashback_rate DESC
                 """,
                 (user_id,),
             )
+            return await _fetch_dicts(cursor)
+
+    async def fetch_bank_strength_counts(
+        self, user_id: int, top_threshold: float, weak_threshold: float
+    ) -> list[tuple[str, int, int]]:
+        """Return ``(bank_name, top_count, weak_count)`` aggregated per bank name."""
+
+        async with self._read() as conn:
+            cursor = await conn.execute(
+                """
+                SELECT
+                    ub.custom_name AS bank_name,
+                    SUM(CASE WHEN bc.cashback_rate >= ? THEN 1 ELSE 0 END) AS top_count,
+                    SUM(CASE WHEN bc.cashback_rate < ? THEN 1 ELSE 0 END) AS weak_count
+                FROM bank_categories bc
+                JOIN user_banks ub ON ub.id = bc.user_bank_id
+                WHERE ub.user_id = ?
+                GROUP BY ub.custom_name
+                """,
+                (top_threshold, weak_threshold, user_id),
+            )
             rows = await cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [(row["bank_name"], int(row["top_count"]), int(row["weak_count"])) for row in rows]
 
     # --- Templates ------------------------------------------------------------
 
     async def list_templates(self, user_id: int) -> list[TemplateRecord]:
-        async with self._connect() as conn:
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
                 SELECT id, user_id, template_type, name, payload
@@ -563,90 +1149,160 @@ class AsyncDatabase:
     async def upsert_template(
         self, user_id: int, template_type: str, name: str, payload: dict[str, Any], template_id: int | None = None
     ) -> int:
-        payload_json = json.dumps(payload, ensure_ascii=False)
-        async with self._lock:
-            async with self._connect() as conn:
-                if template_id is None:
-                    LOGGER.debug("Creating template '%s' for user %s", name, user_id)
-                    cursor = await conn.execute(
-                        """
-                        INSERT INTO templates (user_id, template_type, name, payload)
-                        VALUES (?, ?, ?, ?)
-                        """,
-                        (user_id, template_type, name, payload_json),
-                    )
-                    await conn.commit()
-                    return int(cursor.lastrowid)
-                LOGGER.debug("Updating template %s for user %s", template_id, user_id)
-                await conn.execute(
-                    """
-                    UPDATE templates
-                    SET template_type = ?, name = ?, payload = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ? AND user_id = ?
-                    """,
-                    (template_type, name, payload_json, template_id, user_id),
-                )
-                await conn.commit()
-                return template_id
+        if template_id is None:
+            return await self.insert_template(user_id, template_type, name, payload)
+        await self.update_template(user_id, template_id, template_type, name, payload)
+        return template_id
+
+    async def insert_template(
+        self, user_id: int, template_type: str, name: str, payload: dict[str, Any]
+    ) -> int:
+        payload_json = _encode_json(payload)
+
+        def job(conn: sqlite3.Connection) -> int:
+            LOGGER.debug("Creating template '%s' for user %s", name, user_id)
+            cursor = conn.execute(
+                """
+                INSERT INTO templates (user_id, template_type, name, payload)
+                VALUES (?, ?, ?, ?)
+                """,
+                (user_id, template_type, name, payload_json),
+            )
+            return int(cursor.lastrowid)
+
+        return await self._submit(job)
+
+    async def update_template(
+        self, user_id: int, template_id: int, template_type: str, name: str, payload: dict[str, Any]
+    ) -> None:
+        payload_json = _encode_json(payload)
+
+        def job(conn: sqlite3.Connection) -> None:
+            LOGGER.debug("Updating template %s for user %s", template_id, user_id)
+            conn.execute(
+                """
+                UPDATE templates
+                SET template_type = ?, name = ?, payload = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND user_id = ?
+                """,
+                (template_type, name, payload_json, template_id, user_id),
+            )
+
+        await self._submit(job)
 
     async def delete_template(self, user_id: int, template_id: int) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.info("Deleting template %s for user %s", template_id, user_id)
-                await conn.execute(
-                    "DELETE FROM templates WHERE id = ? AND user_id = ?",
-                    (template_id, user_id),
-                )
-                await conn.commit()
+        def job(conn: sqlite3.Connection) -> None:
+            LOGGER.info("Deleting template %s for user %s", template_id, user_id)
+            conn.execute(
+                "DELETE FROM templates WHERE id = ? AND user_id = ?",
+                (template_id, user_id),
+            )
+
+        await self._submit(job)
 
     # --- Activity log ---------------------------------------------------------
 
     async def log_activity(self, user_id: int, action: str, metadata: dict[str, Any] | None = None) -> None:
-        payload = json.dumps(metadata or {}, ensure_ascii=False)
-        async with self._lock:
-            async with self._connect() as conn:
-                await conn.execute(
-                    "INSERT INTO activity_log (user_id, action, metadata) VALUES (?, ?, ?)",
-                    (user_id, action, payload),
+        # Entries without metadata all share one constant instead of encoding "{}" each time.
+        payload = _encode_json(metadata) if metadata else _EMPTY_JSON_OBJECT
+        self._pending_activity.append((user_id, action, payload))
+        if len(self._pending_activity) >= _ACTIVITY_FLUSH_THRESHOLD:
+            self._activity_flush_requested.set()
+
+    async def _activity_flush_loop(self) -> None:
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    self._activity_flush_requested.wait(), _ACTIVITY_FLUSH_INTERVAL
                 )
-                await conn.commit()
+            self._activity_flush_requested.clear()
+            try:
+                await self._flush_activity()
+            except Exception:
+                LOGGER.exception("Failed to flush buffered activity")
+
+    async def _flush_activity(self) -> None:
+        async with self._activity_lock:
+            if not (self._pending_activity or self._pending_last_activity or self._pending_bank_update):
+                return
+            activity, self._pending_activity = self._pending_activity, []
+            bank_updates, self._pending_bank_update = self._pending_bank_update, set()
+            last_activity, self._pending_last_activity = self._pending_last_activity - bank_updates, set()
+            await self._submit(self._activity_job(activity, last_activity, bank_updates))
+
+    @staticmethod
+    def _activity_job(
+        activity: list[tuple[int, str, str]], last_activity: set[int], bank_updates: set[int]
+    ) -> WriteJob:
+        def job(conn: sqlite3.Connection) -> None:
+            LOGGER.debug(
+                "Flushing %d activity entries and %d activity timestamps",
+                len(activity),
+                len(last_activity) + len(bank_updates),
+            )
+            # Entries buffered for a user purged in the meantime are skipped rather
+            # than failing the foreign key and taking everyone else's entries with them.
+            conn.executemany(
+                """
+                INSERT INTO activity_log (user_id, action, metadata)
+                SELECT ?1, ?2, ?3 WHERE EXISTS (SELECT 1 FROM users WHERE id = ?1)
+                """,
+                activity,
+            )
+            conn.executemany(
+                "UPDATE users SET last_activity = CURRENT_TIMESTAMP WHERE id = ?",
+                [(user_id,) for user_id in last_activity],
+            )
+            conn.executemany(
+                """
+                UPDATE users SET last_activity = CURRENT_TIMESTAMP, last_bank_update = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                [(user_id,) for user_id in bank_updates],
+            )
+
+        return job
 
     async def list_activity(self, user_id: int, limit: int) -> list[dict[str, Any]]:
-        async with self._connect() as conn:
+        await self._flush_activity()
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
                 SELECT action, metadata, created_at
                 FROM activity_log
                 WHERE user_id = ?
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
                 LIMIT ?
                 """,
                 (user_id, limit),
             )
             rows = await cursor.fetchall()
-            result: list[dict[str, Any]] = []
-            for row in rows:
-                metadata = json.loads(row["metadata"] or "{}")
-                result.append(
-                    {
-                        "action": row["action"],
-                        "metadata": metadata,
-                        "created_at": row["created_at"],
-                    }
-                )
-            return result
+            return [
+                {
+                    "action": row["action"],
+                    "metadata": _decode_json_object(row["metadata"]),
+                    "created_at": row["created_at"],
+                }
+                for row in rows
+            ]
 
     async def clear_activity(self, user_id: int) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                LOGGER.info("Clearing activity log for user %s", user_id)
-                await conn.execute("DELETE FROM activity_log WHERE user_id = ?", (user_id,))
-                await conn.commit()
+        await self._flush_activity()
+
+        def job(conn: sqlite3.Connection) -> None:
+            LOGGER.info("Clearing activity log for user %s", user_id)
+            conn.execute("DELETE FROM activity_log WHERE user_id = ?", (user_id,))
+
+        await self._submit(job)
 
     # --- Notification settings ------------------------------------------------
 
     async def get_notification_settings(self, user_id: int) -> NotificationSettings:
-        async with self._connect() as conn:
+        cached = self._notification_cache.lookup(user_id)
+        if cached is not MISSING:
+            return replace(cached)
+        generation = self._notification_cache.generation
+        async with self._read() as conn:
             cursor = await conn.execute(
                 """
                 SELECT
@@ -666,7 +1322,7 @@ class AsyncDatabase:
                 LOGGER.debug("Creating default notification settings for user %s", user_id)
                 await self.update_notification_settings(user_id, True, True, True)
                 return NotificationSettings(user_id, True, True, True, None, None, None)
-            return NotificationSettings(
+            settings = NotificationSettings(
                 user_id=user_id,
                 monthly_enabled=bool(row["monthly_enabled"]),
                 inactivity_warning_enabled=bool(row["inactivity_warning_enabled"]),
@@ -675,6 +1331,8 @@ class AsyncDatabase:
                 last_warning_sent=row["last_warning_sent"],
                 last_critical_sent=row["last_critical_sent"],
             )
+        self._notification_cache.store(user_id, settings, generation)
+        return replace(settings)
 
     async def update_notification_settings(
         self,
@@ -683,82 +1341,97 @@ class AsyncDatabase:
         inactivity_warning_enabled: bool,
         inactivity_critical_enabled: bool,
     ) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                await conn.execute(
-                    """
-                    INSERT INTO notification_settings (
-                        user_id, monthly_enabled, inactivity_warning_enabled, inactivity_critical_enabled
-                    ) VALUES (?, ?, ?, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET
-                        monthly_enabled=excluded.monthly_enabled,
-                        inactivity_warning_enabled=excluded.inactivity_warning_enabled,
-                        inactivity_critical_enabled=excluded.inactivity_critical_enabled,
-                        updated_at=CURRENT_TIMESTAMP
-                    """,
-                    (
-                        user_id,
-                        int(monthly_enabled),
-                        int(inactivity_warning_enabled),
-                        int(inactivity_critical_enabled),
-                    ),
-                )
-                await conn.commit()
+        def job(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                """
+                INSERT INTO notification_settings (
+                    user_id, monthly_enabled, inactivity_warning_enabled, inactivity_critical_enabled
+                ) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    monthly_enabled=excluded.monthly_enabled,
+                    inactivity_warning_enabled=excluded.inactivity_warning_enabled,
+                    inactivity_critical_enabled=excluded.inactivity_critical_enabled,
+                    updated_at=CURRENT_TIMESTAMP
+                """,
+                (
+                    user_id,
+                    int(monthly_enabled),
+                    int(inactivity_warning_enabled),
+                    int(inactivity_critical_enabled),
+                ),
+            )
+
+        try:
+            await self._submit(job)
+        finally:
+            self._notification_cache.evict(user_id)
 
     async def mark_notification_sent(self, user_id: int, notification_type: str) -> None:
-        column_map = {
-            "monthly": "last_monthly_sent",
-            "warning": "last_warning_sent",
-            "critical": "last_critical_sent",
-        }
-        column = column_map.get(notification_type)
-        if column is None:
+        statement = _MARK_NOTIFICATION_SENT_SQL.get(notification_type)
+        if statement is None:
             raise ValueError(f"Unknown notification type: {notification_type}")
-        async with self._lock:
-            async with self._connect() as conn:
-                await conn.execute(
-                    f"UPDATE notification_settings SET {column} = CURRENT_TIMESTAMP WHERE user_id = ?",
-                    (user_id,),
-                )
-                await conn.commit()
+
+        def job(conn: sqlite3.Connection) -> None:
+            conn.execute(statement, (user_id,))
+
+        try:
+            await self._submit(job)
+        finally:
+            self._notification_cache.evict(user_id)
 
     # --- Wizard sessions ------------------------------------------------------
 
     async def get_wizard_session(self, user_id: int) -> WizardSession | None:
-        async with self._connect() as conn:
-            cursor = await conn.execute(
-                "SELECT state, payload FROM wizard_sessions WHERE user_id = ?",
-                (user_id,),
-            )
-            row = await cursor.fetchone()
-            if row is None:
-                return None
-            payload = json.loads(row["payload"] or "{}")
-            return WizardSession(user_id=user_id, state=row["state"], payload=payload)
+        cached = self._wizard_cache.lookup(user_id)
+        if cached is MISSING:
+            generation = self._wizard_cache.generation
+            async with self._read() as conn:
+                cursor = await conn.execute(
+                    "SELECT state, payload FROM wizard_sessions WHERE user_id = ?",
+                    (user_id,),
+                )
+                row = await cursor.fetchone()
+            cached = (row["state"], row["payload"]) if row is not None else None
+            self._wizard_cache.store(user_id, cached, generation)
+        if cached is None:
+            return None
+        state, payload_json = cached
+        return WizardSession(user_id=user_id, state=state, payload=_decode_json_object(payload_json))
 
     async def save_wizard_session(self, user_id: int, state: str, payload: dict[str, Any]) -> None:
-        payload_json = json.dumps(payload, ensure_ascii=False)
-        async with self._lock:
-            async with self._connect() as conn:
-                await conn.execute(
-                    """
-                    INSERT INTO wizard_sessions (user_id, state, payload)
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET
-                        state=excluded.state,
-                        payload=excluded.payload,
-                        updated_at=CURRENT_TIMESTAMP
-                    """,
-                    (user_id, state, payload_json),
-                )
-                await conn.commit()
+        payload_json = _encode_json(payload)
+
+        def job(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                """
+                INSERT INTO wizard_sessions (user_id, state, payload)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    state=excluded.state,
+                    payload=excluded.payload,
+                    updated_at=CURRENT_TIMESTAMP
+                """,
+                (user_id, state, payload_json),
+            )
+
+        try:
+            await self._submit(job)
+        except BaseException:
+            self._wizard_cache.evict(user_id)
+            raise
+        self._wizard_cache.write(user_id, (state, payload_json))
 
     async def delete_wizard_session(self, user_id: int) -> None:
-        async with self._lock:
-            async with self._connect() as conn:
-                await conn.execute(
-                    "DELETE FROM wizard_sessions WHERE user_id = ?",
-                    (user_id,),
-                )
-                await conn.commit()
+        def job(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "DELETE FROM wizard_sessions WHERE user_id = ?",
+                (user_id,),
+            )
+
+        try:
+            await self._submit(job)
+        except BaseException:
+            self._wizard_cache.evict(user_id)
+            raise
+        self._wizard_cache.write(user_id, None)
 
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from .db import AsyncDatabase
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class GamificationProfile:
     points: int
     level: str
@@ -10,50 +10,37 @@ from .categories import CategoryNormalizer
 
 LOGGER = logging.getLogger(__name__)
 
-DELETE_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"delete last",
-        r"удал(и|ить) последн",
-        r"remove receipt",
-    )
-]
-
-BEST_CASHBACK_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"best cashback",
-        r"лучший кешбек",
-        r"top rewards",
-    )
-]
-
-RECOMMEND_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"recommend",
-        r"рекомендац",
-    )
-]
-
-HISTORY_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"history",
-        r"журнал",
-    )
-]
-
-PROFILE_PATTERNS = [
-    re.compile(pattern, re.IGNORECASE)
-    for pattern in (
-        r"profile",
-        r"профиль",
-    )
-]
-
-
-@dataclass(frozen=True)
+# Intents in priority order with the lowercase keywords that trigger them. All of them
+# are plain literals, so a substring scan of the lowered text replaces regex matching.
+INTENT_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("delete_last", ("delete last", "удали последн", "удалить последн", "remove receipt")),
+    ("best_cashback", ("best cashback", "лучший кешбек", "top rewards")),
+    ("recommendations", ("recommend", "рекомендац")),
+    ("history", ("history", "журнал")),
+    ("profile", ("profile", "профиль")),
+)
+
+# Covers every symbol the amount pattern accepts, so receipts share one string per code.
+_CURRENCY_CODES = {
+    "₽": "RUB",
+    "$": "USD",
+    "€": "EUR",
+    "RUB": "RUB",
+    "USD": "USD",
+    "EUR": "EUR",
+}
+
+# Receipt fields are searched independently: the merchant and category captures are
+# greedy enough to swallow neighbouring fields, so a single alternation would lose them.
+_AMOUNT_RE = re.compile(r"([0-9]+(?:[.,][0-9]{1,2})?)\s*(RUB|USD|EUR|₽|\$|€)", re.IGNORECASE)
+_MERCHANT_RE = re.compile(r"merchant[:\s]+([\w\s&'-]+)", re.IGNORECASE)
+_CATEGORY_RE = re.compile(r"category[:\s]+([\w\s&'-]+)", re.IGNORECASE)
+_CASHBACK_RE = re.compile(r"cashback[:\s]+([0-9]+(?:[.,][0-9]{1,2})?)", re.IGNORECASE)
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_CATEGORY_LINE_RE = re.compile(r"(.+?)[\s:=\-]+([0-9]+(?:[.,][0-9]{1,2})?)%?")
+
+
+@dataclass(frozen=True, slots=True)
 class ParsedReceipt:
     merchant: str
     category: str
@@ -70,49 +57,34 @@ class NLPService:
         self._normalizer = normalizer
 
     def detect_intent(self, text: str) -> Optional[str]:
-        for pattern in DELETE_PATTERNS:
-            if pattern.search(text):
-                return "delete_last"
-        for pattern in BEST_CASHBACK_PATTERNS:
-            if pattern.search(text):
-                return "best_cashback"
-        for pattern in RECOMMEND_PATTERNS:
-            if pattern.search(text):
-                return "recommendations"
-        for pattern in HISTORY_PATTERNS:
-            if pattern.search(text):
-                return "history"
-        for pattern in PROFILE_PATTERNS:
-            if pattern.search(text):
-                return "profile"
+        lowered = text.lower()
+        for intent, keywords in INTENT_KEYWORDS:
+            for keyword in keywords:
+                if keyword in lowered:
+                    return intent
         return None
 
     def parse_receipt(self, text: str) -> Optional[ParsedReceipt]:
         LOGGER.debug("Parsing receipt text: %s", text)
-        amount_match = re.search(r"([0-9]+(?:[.,][0-9]{1,2})?)\s*(RUB|USD|EUR|₽|\$|€)", text, re.IGNORECASE)
+        amount_match = _AMOUNT_RE.search(text)
         if not amount_match:
             LOGGER.info("Unable to locate amount in receipt text")
             return None
 
         raw_amount = amount_match.group(1).replace(",", ".")
-        currency_symbol = amount_match.group(2).upper()
-        currency = {
-            "₽": "RUB",
-            "$": "USD",
-            "€": "EUR",
-        }.get(currency_symbol, currency_symbol)
-
-        merchant_match = re.search(r"merchant[:\s]+([\w\s&'-]+)", text, re.IGNORECASE)
+        currency = _CURRENCY_CODES[amount_match.group(2).upper()]
+
+        merchant_match = _MERCHANT_RE.search(text)
         merchant = merchant_match.group(1).strip() if merchant_match else "Unknown"
 
-        category_match = re.search(r"category[:\s]+([\w\s&'-]+)", text, re.IGNORECASE)
+        category_match = _CATEGORY_RE.search(text)
         category = category_match.group(1).strip() if category_match else "general"
         normalized_category = self._normalizer.normalize(category)
 
-        cashback_match = re.search(r"cashback[:\s]+([0-9]+(?:[.,][0-9]{1,2})?)", text, re.IGNORECASE)
+        cashback_match = _CASHBACK_RE.search(text)
         cashback = float(cashback_match.group(1).replace(",", ".")) if cashback_match else 0.0
 
-        date_match = re.search(r"(\d{4}-\d{2}-\d{2})", text)
+        date_match = _DATE_RE.search(text)
         purchase_date = date_match.group(1) if date_match else ""
 
         return ParsedReceipt(
@@ -133,7 +105,7 @@ class NLPService:
             cleaned = line.strip()
             if not cleaned:
                 continue
-            match = re.search(r"(.+?)[\s:=\-]+([0-9]+(?:[.,][0-9]{1,2})?)%?", cleaned)
+            match = _CATEGORY_LINE_RE.search(cleaned)
             if not match:
                 continue
             name = match.group(1).strip()
@@ -1,7 +1,9 @@
 """Analytics ranking helpers."""
 from __future__ import annotations
 
+import heapq
 from dataclasses import dataclass
+from operator import itemgetter
 from typing import Iterable, List
 
 
@@ -24,8 +26,5 @@ class RankingService:
     def build_category_ranking(
         self, summaries: Iterable[tuple[str, float, float]], limit: int = 5
     ) -> List[CategorySummary]:
-        top = []
-        for category, total_amount, total_cashback in summaries:
-            top.append(CategorySummary(category, total_amount, total_cashback))
-        top.sort(key=lambda summary: summary.total_cashback, reverse=True)
-        return top[:limit]
+        top = heapq.nlargest(limit, summaries, key=itemgetter(2))
+        return [CategorySummary(*summary) for summary in top]
@@ -9,7 +9,7 @@ from .categories import CategoryNormalizer
 from .db import AsyncDatabase
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Recommendation:
     title: str
     details: str
@@ -28,7 +28,7 @@ class RecommendationService:
         categories = await self._db.fetch_all_category_rates(user_id)
         best: Optional[dict[str, Any]] = None
         for entry in categories:
-            if self._normalizer.normalize(entry["normalized_name"]) != normalized:
+            if entry["canonical_name"] != normalized:
                 continue
             if best is None or entry["cashback_rate"] > best["cashback_rate"]:
                 best = entry
@@ -78,7 +78,7 @@ class RecommendationService:
         categories = await self._db.fetch_all_category_rates(user_id)
         coverage: Dict[str, float] = defaultdict(float)
         for entry in categories:
-            normalized = self._normalizer.normalize(entry["normalized_name"])
+            normalized = entry["canonical_name"]
             coverage[normalized] = max(coverage[normalized], float(entry["cashback_rate"]))
         opportunities: List[Recommendation] = []
         for category, rate in coverage.items():
@@ -5,8 +5,11 @@ import json
 from dataclasses import dataclass
 from typing import Any, Iterable
 
+from .cache import MISSING, WriteThroughCache
 from .db import AsyncDatabase, TemplateRecord
 
+_USER_VIEWS_CACHE_SIZE = 1024
+
 
 @dataclass(frozen=True)
 class TemplateDefinition:
@@ -63,29 +66,54 @@ class TemplateService:
 
     def __init__(self, db: AsyncDatabase) -> None:
         self._db = db
+        self._default_views: dict[str, dict[str, TemplateView]] = {}
+        self._user_views = WriteThroughCache(_USER_VIEWS_CACHE_SIZE)
 
     async def list_templates(self, user_id: int, locale: str) -> list[TemplateView]:
-        user_templates = await self._db.list_templates(user_id)
-        views: list[TemplateView] = []
-        for definition in DEFAULT_TEMPLATES:
-            views.append(
-                TemplateView(
-                    identifier=f"default:{definition.key}",
-                    title=definition.title_i18n.get(locale, definition.title_i18n["en"]),
-                    payload=self._build_payload(definition.fields),
-                    is_default=True,
+        user_views = await self._user_views_for(user_id)
+        return [*self._defaults_for(locale).values(), *user_views.values()]
+
+    async def get_template(self, user_id: int, locale: str, identifier: str) -> TemplateView | None:
+        if identifier.startswith("default:"):
+            return self._defaults_for(locale).get(identifier)
+        user_views = await self._user_views_for(user_id)
+        return user_views.get(identifier)
+
+    def _defaults_for(self, locale: str) -> dict[str, TemplateView]:
+        views = self._default_views.get(locale)
+        if views is None:
+            views = self._default_views[locale] = {
+                view.identifier: view
+                for view in (
+                    TemplateView(
+                        identifier=f"default:{definition.key}",
+                        title=definition.title_i18n.get(locale, definition.title_i18n["en"]),
+                        payload=self._build_payload(definition.fields),
+                        is_default=True,
+                    )
+                    for definition in DEFAULT_TEMPLATES
                 )
-            )
-        for record in user_templates:
-            payload = self._safe_payload(record)
-            views.append(
-                TemplateView(
-                    identifier=f"user:{record.id}",
-                    title=record.name,
-                    payload=payload,
-                    is_default=False,
+            }
+        return views
+
+    async def _user_views_for(self, user_id: int) -> dict[str, TemplateView]:
+        views = self._user_views.lookup(user_id)
+        if views is MISSING:
+            generation = self._user_views.generation
+            records = await self._db.list_templates(user_id)
+            views = {
+                view.identifier: view
+                for view in (
+                    TemplateView(
+                        identifier=f"user:{record.id}",
+                        title=record.name,
+                        payload=self._safe_payload(record),
+                        is_default=False,
+                    )
+                    for record in records
                 )
-            )
+            }
+            self._user_views.store(user_id, views, generation)
         return views
 
     async def upsert_template(
@@ -96,10 +124,26 @@ class TemplateService:
         payload: dict[str, Any],
         template_id: int | None = None,
     ) -> int:
-        return await self._db.upsert_template(user_id, template_type, name, payload, template_id)
+        saved_id = await self._db.upsert_template(user_id, template_type, name, payload, template_id)
+        self._user_views.evict(user_id)
+        return saved_id
+
+    async def insert_template(
+        self, user_id: int, template_type: str, name: str, payload: dict[str, Any]
+    ) -> int:
+        template_id = await self._db.insert_template(user_id, template_type, name, payload)
+        self._user_views.evict(user_id)
+        return template_id
+
+    async def update_template(
+        self, user_id: int, template_id: int, template_type: str, name: str, payload: dict[str, Any]
+    ) -> None:
+        await self._db.update_template(user_id, template_id, template_type, name, payload)
+        self._user_views.evict(user_id)
 
     async def delete_template(self, user_id: int, template_id: int) -> None:
         await self._db.delete_template(user_id, template_id)
+        self._user_views.evict(user_id)
 
     def _safe_payload(self, record: TemplateRecord) -> dict[str, Any]:
         try:
@@ -4,6 +4,7 @@ from __future__ import annotations
 import asyncio
 import logging
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Sequence
 
 from telegram import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message, Update
@@ -14,7 +15,7 @@ from telegram.ext import ContextTypes
 LOGGER = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ButtonSpec:
     """Descriptor for a single inline button."""
 
@@ -28,6 +29,18 @@ KeyboardLayout = Sequence[Sequence[ButtonSpec | tuple[str, str]]]
 def build_keyboard(layout: KeyboardLayout | None) -> InlineKeyboardMarkup | None:
     if not layout:
         return None
+    if isinstance(layout, tuple) and all(isinstance(row, tuple) for row in layout):
+        # Fully immutable layouts (e.g. the localized static menus) share one markup.
+        return _build_static_keyboard(layout)
+    return _build_markup(layout)
+
+
+@lru_cache(maxsize=256)
+def _build_static_keyboard(layout: KeyboardLayout) -> InlineKeyboardMarkup:
+    return _build_markup(layout)
+
+
+def _build_markup(layout: KeyboardLayout) -> InlineKeyboardMarkup:
     normalized: list[list[InlineKeyboardButton]] = []
     for row in layout:
         buttons: list[InlineKeyboardButton] = []
@@ -72,22 +85,11 @@ async def render_screen(
             LOGGER.exception("Failed to send typing indicator")
 
     markup = build_keyboard(keyboard)
-    message_id = context.user_data.get("screen_message_id")
-    status_id = context.user_data.get("status_message_id")
-
-    async def _cleanup_status() -> None:
-        if not status_id:
-            return
-        try:
-            await context.bot.delete_message(chat_id=chat_id, message_id=status_id)
-        except BadRequest:
-            LOGGER.debug("Status message %s already gone", status_id)
-        except Exception:  # pragma: no cover - log unexpected
-            LOGGER.exception("Failed to delete status message %s", status_id)
-        finally:
-            context.user_data.pop("status_message_id", None)
-
-    await _cleanup_status()
+    user_data = context.user_data
+    message_id = user_data.get("screen_message_id")
+    status_id = user_data.get("status_message_id")
+    if status_id:
+        await _cleanup_status(context, chat_id, status_id)
 
     if status:
         status_message = await context.bot.send_message(
@@ -95,7 +97,7 @@ async def render_screen(
             text=status,
             parse_mode=parse_mode,
         )
-        context.user_data["status_message_id"] = status_message.message_id
+        user_data["status_message_id"] = status_message.message_id
 
     if isinstance(update, CallbackQuery) and update.message:
         query_message = update.message
@@ -120,7 +122,7 @@ async def render_screen(
             reply_markup=markup,
             parse_mode=parse_mode,
         )
-        context.user_data["screen_message_id"] = new_message.message_id
+        user_data["screen_message_id"] = new_message.message_id
         return new_message
 
     if isinstance(update, Update):
@@ -139,12 +141,23 @@ async def render_screen(
             reply_markup=markup,
             parse_mode=parse_mode,
         )
-        context.user_data["screen_message_id"] = new_message.message_id
+        user_data["screen_message_id"] = new_message.message_id
         return new_message
 
     raise RuntimeError("Unsupported update type for rendering")
 
 
+async def _cleanup_status(context: ContextTypes.DEFAULT_TYPE, chat_id: int, status_id: int) -> None:
+    try:
+        await context.bot.delete_message(chat_id=chat_id, message_id=status_id)
+    except BadRequest:
+        LOGGER.debug("Status message %s already gone", status_id)
+    except Exception:  # pragma: no cover - log unexpected
+        LOGGER.exception("Failed to delete status message %s", status_id)
+    finally:
+        context.user_data.pop("status_message_id", None)
+
+
 async def notify_processing(
     update: Update | CallbackQuery,
     context: ContextTypes.DEFAULT_TYPE,
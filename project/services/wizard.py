@@ -9,7 +9,7 @@ from .categories import CategoryNormalizer
 from .db import AsyncDatabase, WizardSession
 
 
-@dataclass
+@dataclass(slots=True)
 class WizardData:
     user_id: int
     step: str = "select_bank"
@@ -49,15 +49,14 @@ class WizardService:
             raise ValueError("Bank name is required for wizard finalization")
         if not data.categories:
             raise ValueError("At least one category is required to save the bank")
-        user_bank_id = await self._db.create_user_bank(data.user_id, data.bank_name, data.bank_id)
         rows = []
+        normalize = self._normalizer.normalize
         for entry in data.categories:
             name = entry.get("name")
             rate = float(entry.get("rate", 0.0))
             level = int(entry.get("level", 1))
-            normalized = self._normalizer.normalize(name)
-            rows.append((name, normalized, rate, level))
-        await self._db.replace_bank_categories(user_bank_id, rows)
+            rows.append((name, normalize(name), rate, level))
+        user_bank_id = await self._db.create_user_bank(data.user_id, data.bank_name, data.bank_id, rows)
         await self._db.delete_wizard_session(data.user_id)
         return user_bank_id
 
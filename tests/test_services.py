@@ -1,4 +1,6 @@
+import asyncio
 from pathlib import Path
+import sqlite3
 import sys
 
 import pytest
@@ -12,6 +14,8 @@ from cashback_bot.services.nlp_intents import IntentBuilder
 from cashback_bot.services.queue import QueueTask, WorkflowQueue
 from cashback_bot.services.ranking import RankingService
 from cashback_bot.services.storage import StorageService
+from project.services.cache import MISSING
+from project.services.db import AsyncDatabase, NotificationSettings
 
 
 @pytest.mark.asyncio
@@ -60,3 +64,155 @@ async def test_queue_per_user_isolation() -> None:
     assert task and task.user_id == 1
     other = await queue.next_task(2)
     assert other and other.user_id == 2
+
+
+@pytest.mark.asyncio
+async def test_database_batch_failure_is_isolated(tmp_path: Path) -> None:
+    db = AsyncDatabase(tmp_path / "db.sqlite3")
+    await db.init()
+    try:
+        user_id = await db.upsert_user(telegram_id=1, language="ru")
+        results = await asyncio.gather(
+            db.create_user_bank(user_id, "A"),
+            db.create_user_bank(99999, "Ghost"),
+            db.create_user_bank(user_id, "B"),
+            return_exceptions=True,
+        )
+        assert isinstance(results[1], sqlite3.IntegrityError)
+        assert isinstance(results[0], int) and isinstance(results[2], int)
+        banks = await db.list_user_banks(user_id)
+        assert [bank.custom_name for bank in banks] == ["A", "B"]
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_database_close_drains_pending_writes(tmp_path: Path) -> None:
+    path = tmp_path / "db.sqlite3"
+    db = AsyncDatabase(path)
+    await db.init()
+    user_id = await db.upsert_user(telegram_id=1, language="ru")
+    pending = asyncio.create_task(db.create_user_bank(user_id, "A"))
+    await asyncio.sleep(0)
+    await db.log_activity(user_id, "receipt_added", {"amount": 10})
+    await db.close()
+    assert isinstance(await pending, int)
+
+    db = AsyncDatabase(path)
+    await db.init()
+    try:
+        assert [bank.custom_name for bank in await db.list_user_banks(user_id)] == ["A"]
+        activity = await db.list_activity(user_id, limit=10)
+        assert [entry["action"] for entry in activity] == ["receipt_added"]
+        assert activity[0]["metadata"] == {"amount": 10}
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_database_failed_writes_evict_cached_entries(tmp_path: Path) -> None:
+    db = AsyncDatabase(tmp_path / "db.sqlite3")
+    await db.init()
+    try:
+        missing_user = 99999
+        assert await db.get_wizard_session(missing_user) is None
+        assert db._wizard_cache.lookup(missing_user) is None
+        with pytest.raises(sqlite3.IntegrityError):
+            await db.save_wizard_session(missing_user, "bank_name", {"bank": "A"})
+        assert db._wizard_cache.lookup(missing_user) is MISSING
+
+        db._notification_cache.write(
+            missing_user, NotificationSettings(missing_user, True, True, True, None, None, None)
+        )
+        with pytest.raises(sqlite3.IntegrityError):
+            await db.update_notification_settings(missing_user, False, False, False)
+        assert db._notification_cache.lookup(missing_user) is MISSING
+
+        user_id = await db.upsert_user(telegram_id=1, language="ru")
+        await db.save_wizard_session(user_id, "bank_name", {"bank": "A"})
+        session = await db.get_wizard_session(user_id)
+        assert session is not None and session.payload == {"bank": "A"}
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_database_replace_bank_categories_diff(tmp_path: Path) -> None:
+    db = AsyncDatabase(tmp_path / "db.sqlite3")
+    await db.init()
+    try:
+        user_id = await db.upsert_user(telegram_id=1, language="ru")
+        bank_id = await db.create_user_bank(
+            user_id,
+            "A",
+            categories=[("Taxi", "taxi", 0.05, 1), ("Food", "food", 0.01, 1), ("Books", "books", 0.02, 2)],
+        )
+        before = {row.normalized_name: row for row in await db.fetch_bank_categories(bank_id)}
+
+        # Wizard lines that normalize to one category resolve last-wins on create too.
+        dining_bank = await db.create_user_bank(
+            user_id, "B", categories=[("Кафе", "dining", 0.03, 1), ("Рестораны", "dining", 0.05, 1)]
+        )
+        dining = await db.fetch_bank_categories(dining_bank)
+        assert [(row.name, row.cashback_rate) for row in dining] == [("Рестораны", pytest.approx(0.05))]
+
+        await db.replace_bank_categories(
+            bank_id,
+            [
+                ("Taxi", "taxi", 0.05, 1),
+                ("Food", "food", 0.03, 1),
+                ("Cinema", "cinema", 0.1, 1),
+                ("Кино", "cinema", 0.12, 1),
+            ],
+        )
+        after = {row.normalized_name: row for row in await db.fetch_bank_categories(bank_id)}
+        assert set(after) == {"taxi", "food", "cinema"}
+        # Unchanged and updated rows keep their ids; only new keys get inserted.
+        assert after["taxi"].id == before["taxi"].id
+        assert after["food"].id == before["food"].id
+        assert after["food"].cashback_rate == pytest.approx(0.03)
+        # Duplicate (normalized_name, level) rows resolve to the last one given.
+        assert (after["cinema"].name, after["cinema"].cashback_rate) == ("Кино", pytest.approx(0.12))
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_database_activity_flush_is_visible_to_reads(tmp_path: Path) -> None:
+    db = AsyncDatabase(tmp_path / "db.sqlite3")
+    await db.init()
+    try:
+        user_id = await db.upsert_user(telegram_id=1, language="ru")
+        for action in ("first", "second", "third"):
+            await db.log_activity(user_id, action)
+        await db.log_activity(99999, "orphan")
+        # Start a background flush and read while its job is still in flight.
+        background = asyncio.create_task(db._flush_activity())
+        await asyncio.sleep(0)
+        activity = await db.list_activity(user_id, limit=10)
+        await background
+        assert [entry["action"] for entry in activity] == ["third", "second", "first"]
+    finally:
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_database_rates_version_is_per_user(tmp_path: Path) -> None:
+    db = AsyncDatabase(tmp_path / "db.sqlite3")
+    await db.init()
+    try:
+        first = await db.upsert_user(telegram_id=1, language="ru")
+        second = await db.upsert_user(telegram_id=2, language="ru")
+        bank_id = await db.create_user_bank(first, "A", categories=[("Taxi", "taxi", 0.05, 1)])
+        version = db.rates_version(first)
+        other_bank = await db.create_user_bank(second, "B")
+        await db.replace_bank_categories(other_bank, [("Food", "food", 0.01, 1)])
+        await db.delete_user_bank(other_bank)
+        assert db.rates_version(first) == version
+        await db.update_user_bank_name(bank_id, "A+")
+        assert db.rates_version(first) != version
+        version = db.rates_version(first)
+        await db.sync_category_aliases({"такси": "taxi"})
+        assert db.rates_version(first) != version
+    finally:
+        await db.close()